@@ -0,0 +1,71 @@
+"""Benchmark headline extraction on saved pages: full-tree parse vs. the strained extractor.
+
+Usage: python benchmarks/html_extraction.py [page.html ...]
+Without arguments every *.html file in benchmarks/pages/ is used. The committed pages cover the three
+extraction paths (classed headline tags, `article` fallback, `.post` fallback); add real ones with e.g.
+`curl -o benchmarks/pages/site.html https://...`. If there are none, a synthetic news page is generated.
+"""
+import glob
+import os
+import sys
+import time
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules import html_headlines  # noqa: E402
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+ROUNDS = 5
+MAX_ITEMS = 100
+QUOTA = 10
+
+def legacy_extract(content):
+    """The scraping path before the strained extractor: full html.parser tree, then find_all/select."""
+    soup = BeautifulSoup(content, 'html.parser')
+    headline_tags = soup.find_all(['h1', 'h2', 'h3', 'a'], class_=['title', 'headline', 'post-title', 'entry-title', 'news-title'])
+    if not headline_tags:
+        headline_tags = soup.select('article h1, article h2, .post h1, .post h2, .entry h1, .entry h2')
+    candidates = [tag.get_text(strip=True) for tag in headline_tags[:MAX_ITEMS]]
+    return [h for h in candidates if len(h) >= 10]
+
+def synthetic_page(stories=400, filler=40):
+    """A ~2 MB page shaped like a news front page: nav, teasers, scripts and lots of non-headline markup."""
+    parts = ["<!doctype html><html><head><title>News</title>", "<script>" + "var x=1;" * 20000 + "</script></head><body>"]
+    parts.append("<nav>" + "".join(f"<a href='/s{i}'>Section {i}</a>" for i in range(200)) + "</nav>")
+    for i in range(stories):
+        parts.append(f"<div class='teaser'><h2 class='headline'><a href='/story/{i}'>Story number {i} about the city council budget</a></h2>")
+        parts.append("".join(f"<p><span>Paragraph {j} of teaser {i} with some body text.</span></p>" for j in range(filler)))
+        parts.append("</div>")
+    parts.append("</body></html>")
+    return "".join(parts).encode('utf-8')
+
+def timed(func, content):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = func(content)
+    return (time.perf_counter() - start) / ROUNDS * 1000, result
+
+def main(paths, source):
+    pages = [(os.path.basename(path), open(path, 'rb').read()) for path in paths]
+    if not pages:
+        source = f"synthetic page (no *.html in {PAGES_DIR})"
+        pages = [("synthetic", synthetic_page())]
+    print(f"Input: {source}")
+    print(f"Parser backend: {html_headlines.HTML_PARSER}, {ROUNDS} rounds per page")
+    for name, content in pages:
+        legacy_ms, expected = timed(legacy_extract, content)
+        strained_ms, (candidates, _, _) = timed(lambda c: html_headlines.extract_headlines(c, MAX_ITEMS), content)
+        known = set()  # Nothing stored yet: stops after the first QUOTA headlines
+        early_ms, (early, _, _) = timed(lambda c: html_headlines.extract_headlines(c, MAX_ITEMS, known, QUOTA), content)
+        same = "same" if candidates == expected else f"DIFFERENT ({len(candidates)} vs {len(expected)})"
+        prefix = "prefix" if early == expected[:len(early)] else "DIFFERENT"
+        print(f"{name}: {len(content) / 1e6:.1f} MB, {len(expected)} headlines | full tree {legacy_ms:.1f} ms | "
+              f"strained {strained_ms:.1f} ms ({legacy_ms / strained_ms:.1f}x) | output {same} | "
+              f"early stop at {QUOTA} new {early_ms:.1f} ms, output {prefix}")
+
+if __name__ == "__main__":
+    if sys.argv[1:]:
+        main(sys.argv[1:], f"{len(sys.argv) - 1} page(s) from the command line")
+    else:
+        saved = sorted(glob.glob(os.path.join(PAGES_DIR, "*.html")))
+        main(saved, f"{len(saved)} saved page(s) in {PAGES_DIR}")
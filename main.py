@@ -3,12 +3,11 @@ import logging
 import sys
 import os
 from datetime import datetime
-from modules.xlogin_core import get_logged_in_driver
-from modules.headline_fetcher import fetch_and_save_headlines
-from modules.posting import post_tweet
-from modules.follow import follow_accounts
-from modules.like_posts import like_posts
-from modules.comment import comment_on_posts
+from modules.memories_db import close_connections
+from modules.write_queue import stop_writer
+from modules.parse_pool import shutdown_parse_pool
+from modules.migrations import run_migrations
+from modules.retention import run_maintenance
 
 # Custom logging formatter
 class ConciseFormatter(logging.Formatter):
@@ -55,43 +54,75 @@ class NoiseFilter(logging.Filter):
         return True
 
 # Logging setup
-LOG_DIR = os.path.join(os.path.dirname(__file__), "logs")
-os.makedirs(LOG_DIR, exist_ok=True)
-log_filename = os.path.join(LOG_DIR, f"bot_log_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.txt")
+# Runs from the __main__ guard only: parse workers (modules/parse_pool.py) re-import this file
+def setup_logging():
+    log_dir = os.path.join(os.path.dirname(__file__), "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    log_filename = os.path.join(log_dir, f"bot_log_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.txt")
 
-# Create logger
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+    # Create logger
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
 
-# Clear any existing handlers to avoid duplicates
-logger.handlers.clear()
+    # Clear any existing handlers to avoid duplicates
+    logger.handlers.clear()
 
-# Ensure console uses UTF-8 encoding
-if sys.stdout.encoding != 'utf-8':
-    try:
-        sys.stdout.reconfigure(encoding='utf-8')
-    except AttributeError:  # For older Python versions or if reconfigure fails
-        import io
-        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setFormatter(ConciseFormatter())
-console_handler.addFilter(NoiseFilter())
-logger.addHandler(console_handler)
-
-file_handler = logging.FileHandler(log_filename, encoding='utf-8')  # Ensure file uses UTF-8 too
-file_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
-file_handler.addFilter(NoiseFilter())
-logger.addHandler(file_handler)
-
-logger.setLevel(logging.INFO)
+    # Ensure console uses UTF-8 encoding
+    if sys.stdout.encoding != 'utf-8':
+        try:
+            sys.stdout.reconfigure(encoding='utf-8')
+        except AttributeError:  # For older Python versions or if reconfigure fails
+            import io
+            sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(ConciseFormatter())
+    console_handler.addFilter(NoiseFilter())
+    logger.addHandler(console_handler)
+
+    file_handler = logging.FileHandler(log_filename, encoding='utf-8')  # Ensure file uses UTF-8 too
+    file_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
+    file_handler.addFilter(NoiseFilter())
+    logger.addHandler(file_handler)
+
+    logger.setLevel(logging.INFO)
+
+def update_prefetcher(settings):
+    from modules.headline_prefetch import start_prefetcher, stop_prefetcher
+    if settings.get('research_enabled', True):
+        start_prefetcher(settings)
+    else:
+        logging.info("Research disabled, skipping headline fetch")
+        stop_prefetcher()
+
+def update_drafter(settings):
+    from modules.tweet_drafter import start_drafter, stop_drafter
+    if settings['post_enabled']:
+        start_drafter(settings)
+    else:
+        stop_drafter()
 
 def main():
+    # Bot modules are imported here rather than at the top: parse workers (modules/parse_pool.py) re-import
+    # this file and should not load the browser, GUI and API client stacks just to run the parsers
+    from modules.xlogin_core import get_logged_in_driver
+    from modules.headline_prefetch import stop_prefetcher
+    from modules.tweet_drafter import stop_drafter
+    from modules.posting import post_tweet
+    from modules.follow import follow_accounts
+    from modules.like_posts import like_posts
+    from modules.comment import comment_on_posts
+    run_migrations()
     while True:  # Outer loop for restarting the bot or returning to login view
         logging.info("Bot started")
         result = get_logged_in_driver()
         if result is None:  # Shutdown requested
             logging.info("Shutting down bot gracefully")
+            stop_drafter()
+            stop_prefetcher()
+            shutdown_parse_pool()
+            stop_writer()
+            close_connections()
             sys.exit(0)  # Exit immediately, no loop continuation
         elif result is False:  # Logout requested
             logging.info("Logged out, returning to login view")
@@ -100,15 +131,14 @@ def main():
         driver = result["driver"]
         settings = result["settings"]
         logging.info("Bot running")  # Removed settings from this log
+        update_prefetcher(settings)
+        update_drafter(settings)
 
         run_count = 0
         try:
             while run_count < settings['loop_count']:
                 try:
-                    if settings.get('research_enabled', True):
-                        fetch_and_save_headlines(settings)
-                    else:
-                        logging.info("Research disabled, skipping headline fetch")
+                    # Headlines arrive from the prefetch worker; browser actions never wait on feeds
                     if settings['post_enabled']:
                         post_tweet(driver, settings)
                     if settings['follow_enabled']:
@@ -120,6 +150,7 @@ def main():
                     run_count += 1
                     logging.info(f"Run {run_count}/{settings['loop_count']} complete.")
                     if run_count < settings['loop_count']:
+                        run_maintenance(settings)  # Idle time before the pause
                         logging.info(f"Pausing for {settings['schedule_interval']} minutes before next run...")
                         time.sleep(settings['schedule_interval'] * 60)
                 except Exception as e:
@@ -130,15 +161,24 @@ def main():
                         result = get_logged_in_driver()
                         if result is None:  # Shutdown during recovery
                             logging.info("Shutting down bot gracefully")
+                            stop_drafter()
+                            stop_prefetcher()
+                            shutdown_parse_pool()
+                            stop_writer()
+                            close_connections()
                             sys.exit(0)  # Exit immediately
                         elif result is False:  # Logout during recovery
                             logging.info("Logged out during recovery, returning to login view")
                             break  # Break inner loop to return to login view
                         driver = result["driver"]
                         settings = result["settings"]
+                        update_prefetcher(settings)
+                        update_drafter(settings)
                     time.sleep(10)
 
             logging.info(f"Completed {settings['loop_count']} run(s). Closing browser and restarting interface...")
+            stop_drafter()
+            stop_prefetcher()
             driver.quit()
 
         except Exception as e:
@@ -148,4 +188,5 @@ def main():
             # After crash, loop back to login view instead of exiting
 
 if __name__ == "__main__":
+    setup_logging()
     main()
\ No newline at end of file
@@ -0,0 +1,54 @@
+import logging
+import threading
+
+class BackgroundWorker:
+    """A daemon thread that runs `run_pass(settings)`, then sleeps until `wake` is set or the interval ends.
+
+    `interval(settings)` gives the sleep in minutes. start() swaps in new settings and triggers an
+    immediate pass if the thread is already running; stop() lets the current pass finish.
+    """
+
+    def __init__(self, name, label, run_pass, interval, wake=None):
+        self.name = name
+        self.label = label
+        self.run_pass = run_pass
+        self.interval = interval
+        self.wake = wake or threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._settings = None
+        self._stopping = False
+
+    def _run(self):
+        while True:
+            self.wake.clear()
+            settings = self._settings
+            if self._stopping or settings is None:
+                break
+            try:
+                self.run_pass(settings)
+            except Exception as e:
+                logging.error(f"{self.label} failed: {e}")
+            self.wake.wait(self.interval(settings) * 60)
+
+    def start(self, settings):
+        with self._lock:
+            self._settings = settings
+            self._stopping = False
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+                logging.info(f"{self.label} worker started")
+            else:
+                self.wake.set()
+
+    def stop(self, timeout=30):
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self.wake.set()
+        if thread is None or not thread.is_alive():
+            return
+        thread.join(timeout)
+        if thread.is_alive():
+            logging.warning(f"{self.label} did not finish within {timeout}s, leaving it to exit with the process")
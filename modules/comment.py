@@ -1,25 +1,29 @@
 import time
 import random
 import logging
-import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-import sqlite3
 from datetime import datetime
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, StaleElementReferenceException, ElementClickInterceptedException
-import google.generativeai as genai
-import openai
+from modules.memories_db import get_connection, get_daily_count
+from modules.write_queue import enqueue_write, flush_writes
+from modules.seen_cache import SeenIds
+from modules.content_search import find_prior_content
+from modules.llm_clients import get_api_client
 
 # Hardcoded constants
 DELAY_MIN = 1
 DELAY_MAX = 5
 SCROLL_ATTEMPTS = 5
+COMMENT_DRAFT_SPARE = 1  # Comments drafted beyond the remaining quota, in case a reply box does not open
+COMMENT_DRAFT_WORKERS = 4  # Threads of the process-wide drafting pool
 
-# Configuration
-DB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Database")
-DB_PATH = os.path.join(DB_DIR, "memories.db")
+_draft_pool = None
+_draft_pool_lock = threading.Lock()
 
 # Custom logging formatter with color and concise output
 class ConciseFormatter(logging.Formatter):
@@ -46,88 +50,37 @@ logging.basicConfig(
 )
 logging.getLogger().handlers[0].setFormatter(ConciseFormatter())
 
-# SQLite Database Setup with Migration
-def init_comments_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # Create the table if it doesn't exist
-    c.execute('''CREATE TABLE IF NOT EXISTS comments 
-                 (id INTEGER PRIMARY KEY, 
-                  post_id TEXT, 
-                  comment_text TEXT, 
-                  commented_at TEXT)''')
-    
-    # Check if the 'username' column exists and add it if missing
-    c.execute("PRAGMA table_info(comments)")
-    columns = [col[1] for col in c.fetchall()]
-    if 'username' not in columns:
-        logging.info("Adding 'username' column to comments table")
-        c.execute("ALTER TABLE comments ADD COLUMN username TEXT")
-    
-    # Ensure the UNIQUE constraint exists (SQLite doesn't support modifying constraints directly, so we recreate the table if needed)
-    # Note: This step assumes the original table might not have the UNIQUE constraint; we’ll handle it safely
-    c.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='comments'")
-    create_statement = c.fetchone()[0]
-    if 'UNIQUE(post_id, comment_text)' not in create_statement:
-        logging.info("Adding UNIQUE constraint to comments table")
-        # Create a new table with the updated schema
-        c.execute('''CREATE TABLE comments_new 
-                     (id INTEGER PRIMARY KEY, 
-                      post_id TEXT, 
-                      username TEXT, 
-                      comment_text TEXT, 
-                      commented_at TEXT,
-                      UNIQUE(post_id, comment_text))''')
-        # Migrate data from old table to new table
-        c.execute("INSERT INTO comments_new (id, post_id, comment_text, commented_at) SELECT id, post_id, comment_text, commented_at FROM comments")
-        # Drop the old table and rename the new one
-        c.execute("DROP TABLE comments")
-        c.execute("ALTER TABLE comments_new RENAME TO comments")
-    
-    conn.commit()
-    conn.close()
+# Commented posts (schema lives in modules/migrations.py)
+commented_posts = SeenIds('comments', 'post_id')
 
 def save_comment(post_id, username, comment_text):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("INSERT OR IGNORE INTO comments (post_id, username, comment_text, commented_at) VALUES (?, ?, ?, ?)", 
-              (post_id, username, comment_text, datetime.now().strftime("%Y-%m-d %H:%M:%S")))
-    rows_affected = conn.total_changes
-    conn.commit()
-    conn.close()
-    return rows_affected > 0
+    """Record a comment via the write-behind queue; returns False if the post was already commented."""
+    is_new = post_id not in commented_posts
+    now = datetime.now()
+    enqueue_write("INSERT OR IGNORE INTO comments (post_id, username, comment_text, commented_at, created_ts) VALUES (?, ?, ?, ?, ?)", 
+                  (post_id, username, comment_text, now.strftime("%Y-%m-%d %H:%M:%S"), int(now.timestamp())))
+    commented_posts.add(post_id)
+    return is_new
+
+def is_post_commented(post_id):
+    return post_id in commented_posts
 
 def get_comments_count_today():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    today = datetime.now().strftime("%Y-%m-%d")
-    c.execute("SELECT COUNT(*) FROM comments WHERE commented_at LIKE ?", (f"{today}%",))
-    count = c.fetchone()[0]
-    conn.close()
-    return count
+    flush_writes()
+    return get_daily_count('comment')
 
 def get_previous_comments(limit=50):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT comment_text FROM comments ORDER BY commented_at DESC LIMIT ?", (limit,))
-    comments = [row[0] for row in c.fetchall()]
-    conn.close()
-    return comments
-
-init_comments_db()
+    flush_writes()
+    c = get_connection().execute("SELECT comment_text FROM comments ORDER BY created_ts DESC LIMIT ?", (limit,))
+    return [row[0] for row in c.fetchall()]
 
 def strip_non_bmp(text):
     return ''.join(c for c in text if ord(c) <= 65535 and not (0xFE00 <= ord(c) <= 0xFE0F))
 
-# Configure API client based on settings
+# Shared API client for the configured provider and key (modules/llm_clients.py)
 def configure_api_client(settings):
     try:
-        if settings['api_type'] == 'openai':
-            return openai.OpenAI(api_key=settings['api_key'])
-        else:  # gemini
-            genai.configure(api_key=settings['api_key'])
-            return genai.GenerativeModel('gemini-1.5-flash')
+        return get_api_client(settings)
     except Exception as e:
         logging.error(f"Failed to configure {settings['api_type']} API: {repr(e)}")
         return None
@@ -144,6 +97,7 @@ def generate_contextual_comment(post_text, poster_username, settings):
     language = settings.get('language', 'English')
     autodetect = settings.get('autodetect_language', False)
     previous_comments = get_previous_comments()  # Fetch previous comments to avoid repetition
+    previous_comments = list(dict.fromkeys(find_prior_content(post_text, 'comments') + previous_comments))  # Plus older ones on the same topic
 
     if autodetect:
         try:
@@ -194,6 +148,86 @@ def generate_contextual_comment(post_text, poster_username, settings):
         logging.warning(f"{settings['api_type'].capitalize()} API failed for comment generation: {repr(e)}")
         return "Kiek mal, wie schnieke der Post is!" if personality == "BerlinerSchnauze" else "Cool post, thanks for sharing!"
 
+def get_draft_pool():
+    """Long-lived pool the comment drafts run on; its threads and their DB connections are reused across runs."""
+    global _draft_pool
+    with _draft_pool_lock:
+        if _draft_pool is None:
+            _draft_pool = ThreadPoolExecutor(max_workers=COMMENT_DRAFT_WORKERS, thread_name_prefix="comment-draft")
+        return _draft_pool
+
+def harvest_candidates(tweets, skip_ids=()):
+    """(tweet, post_id, username, text) of the visible posts that are open for replies and not commented yet."""
+    candidates = []
+    for tweet in tweets:
+        try:
+            # Get post ID
+            try:
+                link_elem = tweet.find_element(By.XPATH, ".//a[@role='link' and .//time]")
+                post_id = link_elem.get_attribute("href").split('/')[-1]
+            except NoSuchElementException:
+                post_id = f"tweet_{int(time.time()*1000)}"
+                logging.warning(f"Using fallback post_id: {post_id}")
+            if post_id in skip_ids:
+                continue
+
+            # Extract username of the poster
+            try:
+                username_elem = tweet.find_element(By.XPATH, ".//span[starts-with(text(), '@')]")
+                poster_username = username_elem.text.lstrip('@')
+            except NoSuchElementException:
+                poster_username = "unknown"
+                logging.warning(f"Could not extract username for post {post_id}, using 'unknown'")
+
+            # Extract full post text
+            try:
+                text_elements = tweet.find_elements(By.XPATH, ".//div[@lang]//span")
+                post_text = " ".join([elem.text.strip() for elem in text_elements if elem.text.strip()])
+                if not post_text:
+                    post_text = "[Empty or media-only post]"
+            except NoSuchElementException:
+                logging.warning(f"Failed to extract text for post {post_id}")
+                continue
+
+            # Check if already commented
+            if is_post_commented(post_id):
+                logging.info(f"Skipping already commented post '{post_text}' (ID: {post_id}) by @{poster_username}")
+                continue
+
+            # Reply button, without waiting: a missing or disabled one means restricted replies
+            reply_buttons = tweet.find_elements(By.XPATH, ".//button[@data-testid='reply']")
+            if not reply_buttons or not reply_buttons[0].is_enabled():
+                logging.info(f"Post '{post_text}' (ID: {post_id}) by @{poster_username} has restricted replies, skipping")
+                continue
+            candidates.append((tweet, post_id, poster_username, post_text))
+        except (NoSuchElementException, StaleElementReferenceException) as e:
+            logging.warning(f"Skipping tweet due to error: {repr(e)}")
+    return candidates
+
+def reply_to_post(driver, tweet, comment):
+    """Open the reply box of `tweet`, type the already drafted `comment` and send it."""
+    comment_button = WebDriverWait(tweet, 10).until(
+        EC.element_to_be_clickable((By.XPATH, ".//button[@data-testid='reply']"))
+    )
+    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", comment_button)
+    time.sleep(random.uniform(0.5, 1.5))
+    driver.execute_script("arguments[0].click();", comment_button)
+    time.sleep(random.uniform(1, 2))
+
+    # Comment box
+    comment_box = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.XPATH, "//div[@data-testid='tweetTextarea_0' and @role='textbox']"))
+    )
+    comment_box.send_keys(comment)
+    time.sleep(random.uniform(0.5, 1.5))
+
+    # Reply button
+    reply_button = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.XPATH, "//button[@data-testid='tweetButton']"))
+    )
+    driver.execute_script("arguments[0].click();", reply_button)
+    time.sleep(random.uniform(2, 4))
+
 def comment_on_posts(driver, settings):
     """Comment on posts based on user-defined keywords, respecting daily limit."""
     success = False
@@ -230,6 +264,7 @@ def comment_on_posts(driver, settings):
 
         scroll_count = 0
         commented_this_run = 0
+        handled = set()  # Posts drafted for already, so later scrolls do not draft them again
         remaining_comments = min(daily_limit - current_comment_count, 1)
 
         while commented_this_run < remaining_comments and scroll_count < SCROLL_ATTEMPTS:
@@ -240,81 +275,34 @@ def comment_on_posts(driver, settings):
                 )
                 logging.info(f"Found {len(tweets)} tweets, scroll {scroll_count}")
 
-                for tweet in tweets:
-                    current_comment_count = get_comments_count_today()
-                    if current_comment_count >= daily_limit:
-                        logging.info(f"Daily limit ({daily_limit}) reached during run: {current_comment_count} comments")
-                        success = commented_this_run > 0
-                        return success
-
-                    try:
-                        # Get post ID
-                        try:
-                            link_elem = tweet.find_element(By.XPATH, ".//a[@role='link' and .//time]")
-                            post_id = link_elem.get_attribute("href").split('/')[-1]
-                        except NoSuchElementException:
-                            post_id = f"tweet_{int(time.time()*1000)}"
-                            logging.warning(f"Using fallback post_id: {post_id}")
-
-                        # Extract username of the poster
+                # Draft for several posts at once and only open a reply box once its draft is ready
+                candidates = harvest_candidates(tweets, handled)
+                batch = candidates[:remaining_comments - commented_this_run + COMMENT_DRAFT_SPARE]
+                handled.update(post_id for _, post_id, _, _ in batch)
+                if batch:
+                    logging.info(f"Drafting comments for {len(batch)} of {len(candidates)} candidate posts in parallel")
+                pool = get_draft_pool()
+                futures = {}
+                try:
+                    futures = {pool.submit(generate_contextual_comment, post_text, poster_username, settings): (tweet, post_id, poster_username, post_text)
+                               for tweet, post_id, poster_username, post_text in batch}
+                    for future in as_completed(futures):
+                        current_comment_count = get_comments_count_today()
+                        if current_comment_count >= daily_limit:
+                            logging.info(f"Daily limit ({daily_limit}) reached during run: {current_comment_count} comments")
+                            success = commented_this_run > 0
+                            return success
+
+                        tweet, post_id, poster_username, post_text = futures[future]
+                        comment = future.result()  # Falls back to a canned comment on API errors
                         try:
-                            username_elem = tweet.find_element(By.XPATH, ".//span[starts-with(text(), '@')]")
-                            poster_username = username_elem.text.lstrip('@')
-                        except NoSuchElementException:
-                            poster_username = "unknown"
-                            logging.warning(f"Could not extract username for post {post_id}, using 'unknown'")
-
-                        # Extract full post text
-                        try:
-                            text_elements = tweet.find_elements(By.XPATH, ".//div[@lang]//span")
-                            post_text = " ".join([elem.text.strip() for elem in text_elements if elem.text.strip()])
-                            if not post_text:
-                                post_text = "[Empty or media-only post]"
-                        except NoSuchElementException:
-                            post_text = "[Text extraction failed]"
-                            logging.warning(f"Failed to extract text for post {post_id}")
-                            continue
-
-                        # Check if already commented
-                        conn = sqlite3.connect(DB_PATH)
-                        c = conn.cursor()
-                        c.execute("SELECT COUNT(*) FROM comments WHERE post_id = ?", (post_id,))
-                        already_commented = c.fetchone()[0] > 0
-                        conn.close()
-                        if already_commented:
-                            logging.info(f"Skipping already commented post '{post_text}' (ID: {post_id}) by @{poster_username}")
-                            continue
-
-                        # Comment button
-                        try:
-                            comment_button = WebDriverWait(tweet, 10).until(
-                                EC.element_to_be_clickable((By.XPATH, ".//button[@data-testid='reply']"))
-                            )
+                            reply_to_post(driver, tweet, comment)
                         except TimeoutException:
-                            logging.info(f"Post '{post_text}' (ID: {post_id}) by @{poster_username} has restricted replies, skipping")
+                            logging.info(f"Could not open the reply box of post '{post_text}' (ID: {post_id}) by @{poster_username}, skipping")
+                            continue
+                        except (NoSuchElementException, StaleElementReferenceException, ElementClickInterceptedException) as e:
+                            logging.warning(f"Skipping tweet due to error: {repr(e)}")
                             continue
-                        
-                        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", comment_button)
-                        time.sleep(random.uniform(0.5, 1.5))
-                        driver.execute_script("arguments[0].click();", comment_button)
-                        time.sleep(random.uniform(1, 2))
-
-                        # Generate contextual comment using personality settings
-                        comment = generate_contextual_comment(post_text, poster_username, settings)
-
-                        # Comment box
-                        comment_box = WebDriverWait(driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, "//div[@data-testid='tweetTextarea_0' and @role='textbox']"))
-                        )
-                        comment_box.send_keys(comment)
-                        time.sleep(random.uniform(0.5, 1.5))
-
-                        # Reply button
-                        reply_button = WebDriverWait(driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, "//button[@data-testid='tweetButton']"))
-                        )
-                        driver.execute_script("arguments[0].click();", reply_button)
-                        time.sleep(random.uniform(2, 4))
 
                         # Save comment and log
                         if save_comment(post_id, poster_username, comment):
@@ -325,10 +313,9 @@ def comment_on_posts(driver, settings):
                                 break
                         else:
                             logging.info(f"Skipped duplicate comment on post '{post_text}' (ID: {post_id}) by @{poster_username}")
-
-                    except (NoSuchElementException, TimeoutException, StaleElementReferenceException, ElementClickInterceptedException) as e:
-                        logging.warning(f"Skipping tweet due to error: {repr(e)}")
-                        continue
+                finally:
+                    for future in futures:
+                        future.cancel()  # Spare drafts not started yet are dropped, running ones are ignored
 
                 if commented_this_run < remaining_comments:
                     logging.info(f"Scrolling to load more content, attempt {scroll_count}")
@@ -0,0 +1,87 @@
+import logging
+import os
+import re
+import sqlite3
+from modules.memories_db import ARCHIVE_DB_PATH, get_connection
+from modules.migrations import FTS_SOURCES
+from modules.write_queue import flush_writes
+
+# Query shaping
+MAX_QUERY_TERMS = 12  # Most distinctive words of the input that go into the MATCH expression
+MIN_TERM_LENGTH = 3  # Shorter words (articles, "is", "to") only add noise to the ranking
+DEFAULT_LIMIT = 10
+
+_fts_tables = None
+
+def has_fts_index(table):
+    """True when <table>_fts exists; builds without FTS5 skip migration 6."""
+    global _fts_tables
+    if _fts_tables is None:
+        rows = get_connection().execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%\\_fts' ESCAPE '\\'")
+        _fts_tables = {row[0] for row in rows}
+    return f"{table}_fts" in _fts_tables
+
+def query_terms(text, max_terms=MAX_QUERY_TERMS):
+    """Distinct words of `text` worth searching for, longest (most specific) first."""
+    words = {word for word in re.findall(r"\w+", text.casefold()) if len(word) >= MIN_TERM_LENGTH and not word.isdigit()}
+    return sorted(words, key=lambda word: (-len(word), word))[:max_terms]
+
+def build_match_query(text, max_terms=MAX_QUERY_TERMS):
+    """FTS5 MATCH expression ORing the quoted terms of `text`; None if nothing is searchable."""
+    terms = query_terms(text, max_terms)
+    if not terms:
+        return None
+    return " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+def _search(conn, schema, table, text, limit, use_fts):
+    column = FTS_SOURCES[table]
+    if use_fts:
+        match = build_match_query(text)
+        if match is None:
+            return []
+        rows = conn.execute(f"SELECT t.{column} FROM (SELECT rowid, rank FROM {schema}.{table}_fts WHERE {table}_fts MATCH ?) f "
+                            f"JOIN {schema}.{table} t ON t.id = f.rowid ORDER BY f.rank LIMIT ?", (match, limit))
+        return [row[0] for row in rows]
+    terms = query_terms(text)
+    if not terms:
+        return []
+    condition = " OR ".join(f"{column} LIKE ?" for _ in terms)
+    rows = conn.execute(f"SELECT {column} FROM {schema}.{table} WHERE {condition} ORDER BY created_ts DESC LIMIT ?",
+                        [f"%{term}%" for term in terms] + [limit])
+    return [row[0] for row in rows]
+
+def _search_archive(conn, table, text, limit):
+    """Matches among the rows modules/retention.py moved to memories_archive.db."""
+    if not os.path.exists(ARCHIVE_DB_PATH):
+        return []
+    try:
+        conn.execute("ATTACH DATABASE ? AS archive", (ARCHIVE_DB_PATH,))
+    except sqlite3.Error as e:  # e.g. archiving in progress on this connection
+        logging.warning(f"Archived {table} not searched: {e}")
+        return []
+    try:
+        names = {row[0] for row in conn.execute("SELECT name FROM archive.sqlite_master WHERE name IN (?, ?)", (table, f"{table}_fts"))}
+        if table not in names:
+            return []
+        return _search(conn, 'archive', table, text, limit, f"{table}_fts" in names)
+    finally:
+        conn.execute("DETACH DATABASE archive")
+
+def find_prior_content(text, table, limit=DEFAULT_LIMIT):
+    """Stored rows of `table` on the same topic as `text`, best bm25 match first.
+
+    Rows archived by modules/retention.py are searched too and follow the live matches.
+    """
+    flush_writes()
+    conn = get_connection()
+    use_fts = has_fts_index(table)
+    if not use_fts:
+        logging.debug(f"No FTS5 index on {table}, scanning with LIKE")
+    found = _search(conn, 'main', table, text, limit, use_fts)
+    if len(found) < limit:
+        found += [row for row in _search_archive(conn, table, text, limit - len(found)) if row not in found]
+    return found
+
+def search_content(text, tables=tuple(FTS_SOURCES), limit=DEFAULT_LIMIT):
+    """Prior content on the topic of `text` across several tables: {table: [text, ...]}."""
+    return {table: find_prior_content(text, table, limit) for table in tables}
@@ -0,0 +1,33 @@
+import time
+from modules.memories_db import get_connection
+
+# A page without an advertised feed is checked again after this long
+DISCOVERY_RECHECK = 7 * 86400
+
+def load_feed_map(urls):
+    """{source url: (feed url or None, checked_ts)} for polled sources; a source that is a feed maps to itself."""
+    conn = get_connection()
+    feeds = {}
+    for url in urls:
+        row = conn.execute("SELECT feed_url, checked_ts FROM feed_discovery WHERE source_url = ?", (url,)).fetchone()
+        if row:
+            feeds[url] = row
+    return feeds
+
+def needs_discovery(entry, now=None):
+    """True when a page source should be checked for <link rel="alternate"> feeds on this fetch."""
+    if entry is None:
+        return True
+    feed_url, checked_ts = entry
+    return feed_url is None and checked_ts < int(now or time.time()) - DISCOVERY_RECHECK
+
+def save_feed_url(source_url, feed_url):
+    """Remember the feed found for `source_url`; None records that the page advertises none."""
+    with get_connection() as conn:
+        conn.execute("INSERT OR REPLACE INTO feed_discovery (source_url, feed_url, checked_ts) VALUES (?, ?, ?)",
+                     (source_url, feed_url, int(time.time())))
+
+def forget_feed_url(source_url):
+    """Drop a mapping whose feed failed, so the page is scraped and searched for a feed again."""
+    with get_connection() as conn:
+        conn.execute("DELETE FROM feed_discovery WHERE source_url = ?", (source_url,))
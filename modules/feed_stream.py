@@ -0,0 +1,85 @@
+import html
+import xml.etree.ElementTree as ET
+import feedparser
+from modules.headline_keys import headline_hash
+
+ENTRY_TAGS = ('item', 'entry')  # RSS 0.9x/1.0/2.0 items and Atom entries, matched by local name
+SEEN_STREAK_STOP = 3  # Consecutive already-stored entries after which the rest of the feed is old news
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+def _text(elem):
+    text = "".join(elem.itertext()).strip()
+    return html.unescape(text) if '&' in text else text
+
+def _entry(elem):
+    """(title, guid) of an item/entry element; the guid falls back to the link."""
+    title = guid = link = None
+    for child in elem:
+        name = _local(child.tag)
+        if name == 'title':
+            title = _text(child)
+        elif name in ('guid', 'id'):
+            guid = _text(child)
+        elif name == 'link' and link is None:
+            link = child.get('href') or _text(child)
+    return title, guid or link or None
+
+def iter_feed_entries(chunks):
+    """Yield (title, guid) for each RSS/Atom entry as soon as its closing tag has been parsed.
+
+    Entries are cleared once yielded, so memory does not grow with the feed. Raises
+    ET.ParseError on malformed XML; the caller falls back to feedparser.
+    """
+    parser = ET.XMLPullParser(events=('end',))
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            if _local(elem.tag) in ENTRY_TAGS:
+                yield _entry(elem)
+                elem.clear()
+    parser.close()
+
+def read_feed(chunks, max_items, known_hashes=(), known_guids=(), limit=None):
+    """Read entries until `limit` unseen headlines, SEEN_STREAK_STOP seen ones in a row, or `max_items`.
+
+    Returns (candidates, guids, entries_read, drained, exhausted): guids maps candidate titles to
+    their GUID, drained is False only when the quota cut the feed short, and exhausted tells
+    whether the whole body was consumed.
+    """
+    candidates, guids, fresh = [], {}, set()
+    entries_read = streak = 0
+    entries = iter_feed_entries(chunks)
+    try:
+        for title, guid in entries:
+            entries_read += 1
+            if title:
+                key = headline_hash(title)
+                candidates.append(title)
+                if guid:
+                    guids[title] = guid
+                if key in known_hashes or guid in known_guids:
+                    streak += 1
+                    if streak >= SEEN_STREAK_STOP:
+                        return candidates, guids, entries_read, True, False
+                else:
+                    streak = 0
+                    fresh.add(key)
+                    if limit and len(fresh) >= limit:
+                        return candidates, guids, entries_read, False, False
+            if entries_read >= max_items:
+                return candidates, guids, entries_read, True, False
+    finally:
+        entries.close()
+    return candidates, guids, entries_read, True, True
+
+def parse_feed(content, headers, max_items):
+    """Headlines of an RSS/Atom body via feedparser, for feeds the streaming reader rejects.
+
+    Runs in a parse worker (modules/parse_pool.py). Returns (candidates, guids, total_items).
+    """
+    feed = feedparser.parse(content, response_headers={k.lower(): v for k, v in headers.items()})
+    entries = [entry for entry in feed.entries[:max_items] if entry.get('title')]
+    guids = {entry.title.strip(): entry.get('id') or entry.get('link') for entry in entries}
+    return [entry.title.strip() for entry in entries], {title: guid for title, guid in guids.items() if guid}, len(feed.entries)
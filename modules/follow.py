@@ -1,13 +1,14 @@
-import os
 import random
 import logging
-import sqlite3
 from datetime import datetime
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 import time
+from modules.memories_db import get_daily_count
+from modules.write_queue import enqueue_write, flush_writes
+from modules.seen_cache import SeenIds
 
 # Hardcoded constants (as fallbacks)
 DELAY_MIN = 1
@@ -17,45 +18,21 @@ DEFAULT_KEYWORDS = ["Berlin", "Berliner Leben", "BLN News"]  # Fallback for Berl
 DAILY_FOLLOW_LIMIT = 20
 MAX_FOLLOWS_PER_RUN = 1  # Changed to 1 to ensure only one follow per run
 
-# Configuration
-DB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Database")
-DB_PATH = os.path.join(DB_DIR, "memories.db")
-
-# SQLite Database Setup for Followed Accounts
-def init_follow_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS followed 
-                 (id INTEGER PRIMARY KEY, username TEXT UNIQUE, followed_at TEXT)''')
-    conn.commit()
-    conn.close()
+# Followed accounts (schema lives in modules/migrations.py)
+followed_accounts = SeenIds('followed', 'username')
 
 def save_followed(username):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("INSERT OR IGNORE INTO followed (username, followed_at) VALUES (?, ?)", 
-              (username, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-    conn.commit()
-    conn.close()
+    now = datetime.now()
+    enqueue_write("INSERT OR IGNORE INTO followed (username, followed_at, created_ts) VALUES (?, ?, ?)", 
+                  (username, now.strftime("%Y-%m-%d %H:%M:%S"), int(now.timestamp())))
+    followed_accounts.add(username)
 
 def is_account_followed(username):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM followed WHERE username = ?", (username,))
-    exists = c.fetchone()[0] > 0
-    conn.close()
-    return exists
+    return username in followed_accounts
 
 def get_followed_count_today():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    today = datetime.now().strftime("%Y-%m-%d")
-    c.execute("SELECT COUNT(*) FROM followed WHERE followed_at LIKE ?", (f"{today}%",))
-    count = c.fetchone()[0]
-    conn.close()
-    return count
-
-init_follow_db()
+    flush_writes()
+    return get_daily_count('follow')
 
 def follow_accounts(driver, settings):
     """Follow one account based on user-defined or personality-derived keywords, respecting daily limit."""
@@ -1,12 +1,24 @@
 import requests
-from bs4 import BeautifulSoup
+import threading
 import time
 import random
 import logging
-import os
-import sqlite3
 from datetime import datetime
-import feedparser
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from modules.memories_db import DB_PATH, get_connection
+from modules.migrations import run_migrations
+from modules.headline_keys import headline_hash
+from modules.html_headlines import find_feed_link, parse_page
+from modules.parse_pool import DEFAULT_PARSE_WORKERS, configure_parse_pool, run_parser
+from modules.feed_discovery import forget_feed_url, load_feed_map, needs_discovery, save_feed_url
+from modules.feed_stream import parse_feed, read_feed
+from modules.headline_ranking import update_headline_scores
+from modules.near_duplicates import (NEAR_DUPLICATE_THRESHOLD, find_near_duplicate, headline_tokens, index_headlines,
+                                     is_near_duplicate, prune_near_duplicate_index)
+from modules.source_cache import body_hash, conditional_headers, load_source_cache, save_source_cache
+from modules.source_schedule import get_due_sources, record_poll
+from modules.source_health import check_breakers, record_fetch
 
 # Custom logging formatter (unchanged)
 class ConciseFormatter(logging.Formatter):
@@ -27,62 +39,260 @@ class ConciseFormatter(logging.Formatter):
 logging.basicConfig(level=logging.INFO, handlers=[logging.StreamHandler()])
 logging.getLogger().handlers[0].setFormatter(ConciseFormatter())
 
-DB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Database")
-DB_PATH = os.path.join(DB_DIR, "memories.db")
-
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS headlines 
-                 (id INTEGER PRIMARY KEY, 
-                  headline TEXT UNIQUE, 
-                  source_url TEXT, 
-                  run_number INTEGER, 
-                  timestamp TEXT, 
-                  posted INTEGER DEFAULT 0)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS run_counter 
-                 (id INTEGER PRIMARY KEY CHECK (id = 1), 
-                  count INTEGER DEFAULT 0)''')
-    c.execute("INSERT OR IGNORE INTO run_counter (id, count) VALUES (1, 0)")
-    conn.commit()
-    conn.close()
-    logging.info(f"Initialized/Updated database at {DB_PATH}")
+MAX_ITEMS_PER_SOURCE = 100  # Entries inspected per source
+MAX_NEW_PER_SOURCE = 10  # New headlines kept per source
+LOOKUP_CHUNK_SIZE = 500  # Stay well below SQLite's bound-parameter limit
+DEFAULT_FETCH_CONCURRENCY = 8  # Sources downloaded at once, overridable through settings['fetch_concurrency']
+KNOWN_ENTRIES_PER_SOURCE = 1000  # Recent headlines per source handed to the parsers for early stopping
+STREAM_CHUNK_SIZE = 16 * 1024  # Bytes read from the socket at a time
+FETCH_ATTEMPTS = 3  # Downloads tried per source before giving up for this run
+REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+_session = None
+_session_lock = threading.Lock()
 
 def get_and_increment_run_counter():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT count FROM run_counter WHERE id = 1")
-    run_counter = c.fetchone()[0]
-    new_run_counter = run_counter + 1
-    c.execute("UPDATE run_counter SET count = ? WHERE id = 1", (new_run_counter,))
-    conn.commit()
-    conn.close()
-    return new_run_counter
-
-def headline_exists(headline):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM headlines WHERE headline = ?", (headline,))
-    exists = c.fetchone()[0] > 0
-    conn.close()
-    return exists
-
-def save_headlines(headlines, source_url, run_number):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    new_count = 0
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute("UPDATE run_counter SET count = count + 1 WHERE id = 1")
+        c.execute("SELECT count FROM run_counter WHERE id = 1")
+        return c.fetchone()[0]
+
+def get_existing_headlines(headlines):
+    """Return the subset of `headlines` already stored (after normalization), one set-based query per chunk."""
+    by_key = {}
     for headline in headlines:
-        if not headline_exists(headline):
-            c.execute("INSERT INTO headlines (headline, source_url, run_number, timestamp, posted) VALUES (?, ?, ?, ?, ?)",
-                      (headline, source_url, run_number, timestamp, 0))
-            new_count += 1
-    conn.commit()
-    conn.close()
-    return new_count
+        by_key.setdefault(headline_hash(headline), []).append(headline)
+    keys = list(by_key)
+    known = set()
+    conn = get_connection()
+    for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+        placeholders = ",".join("?" * len(chunk))
+        c = conn.execute(f"SELECT headline_hash FROM headlines WHERE headline_hash IN ({placeholders})", chunk)
+        known.update(row[0] for row in c.fetchall())
+        c = conn.execute(f"SELECT key FROM seen_keys WHERE kind = 'headlines' AND key IN ({placeholders})",
+                         [str(key) for key in chunk])
+        known.update(int(row[0]) for row in c.fetchall())  # Archived by modules/retention.py
+    return {headline for key in known for headline in by_key[key]}
+
+def select_new_headlines(candidates, limit=MAX_NEW_PER_SOURCE, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """Pick up to `limit` unseen headlines from `candidates` with a single DB lookup.
+
+    Headlines differing only in case, whitespace or punctuation count as the same, and
+    headlines whose wording overlaps a recent one by `threshold` or more are the same story.
+    Returns (new_headlines, skip_count, near_count) where skip_count is the number of known
+    headlines and near_count the number of near-duplicates passed over before the limit was reached.
+    """
+    existing = get_existing_headlines(candidates)
+    conn = get_connection()
+    new_headlines = []
+    new_keys = set()
+    new_tokens = []
+    skip_count = near_count = 0
+    for headline in candidates:
+        key = headline_hash(headline)
+        if headline in existing or key in new_keys:
+            skip_count += 1
+            continue
+        tokens = headline_tokens(headline)
+        if any(is_near_duplicate(tokens, other, threshold) for other in new_tokens) or find_near_duplicate(conn, headline, threshold):
+            near_count += 1
+            continue
+        new_headlines.append(headline)
+        new_keys.add(key)
+        new_tokens.append(tokens)
+        if len(new_headlines) >= limit:
+            break
+    return new_headlines, skip_count, near_count
+
+def save_headlines(headlines, source_url, run_number, guids=None):
+    """Bulk-insert headlines in one transaction; returns (inserted, skipped) counts."""
+    now = datetime.now()
+    timestamp, created_ts = now.strftime("%Y-%m-%d %H:%M:%S"), int(now.timestamp())
+    guids = guids or {}
+    rows = [(headline, headline_hash(headline), guids.get(headline), source_url, run_number, timestamp, created_ts) for headline in headlines]
+    with get_connection() as conn:
+        c = conn.executemany("INSERT OR IGNORE INTO headlines (headline, headline_hash, guid, source_url, run_number, timestamp, created_ts, posted) VALUES (?, ?, ?, ?, ?, ?, ?, 0)", rows)
+        inserted_rows = conn.execute("SELECT id, headline, created_ts FROM headlines WHERE source_url = ? AND created_ts = ? AND run_number = ?",
+                                     (source_url, created_ts, run_number)).fetchall()
+        index_headlines(conn, inserted_rows)
+    inserted = max(c.rowcount, 0)
+    return inserted, len(rows) - inserted
+
+def get_session():
+    """Shared keep-alive session; its connection pool is sized for the fetch pool."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update(REQUEST_HEADERS)
+            adapter = requests.adapters.HTTPAdapter(pool_connections=DEFAULT_FETCH_CONCURRENCY, pool_maxsize=DEFAULT_FETCH_CONCURRENCY)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+def _download(url, cached):
+    """Conditional streaming GET; returns (response, unchanged) with only the headers read so far."""
+    response = get_session().get(url, headers=conditional_headers(cached), timeout=10, stream=True)
+    if response.status_code == 304:
+        response.close()
+        return response, True
+    if not response.ok:
+        response.close()  # Hand the pooled connection back before raising
+        response.raise_for_status()
+    return response, False
+
+def is_feed(headers, head):
+    """Sniff RSS/Atom vs HTML from the Content-Type header, then from the first bytes of the body."""
+    content_type = headers.get('Content-Type', '').lower()
+    if 'html' in content_type:
+        return False
+    if any(kind in content_type for kind in ('rss', 'atom', 'rdf', 'xml')):
+        return True
+    head = head[:1024].lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    return b'<html' not in head and (head.startswith(b'<?xml') or any(tag in head for tag in (b'<rss', b'<feed', b'<rdf:rdf')))
+
+def get_known_entries(source_url, limit=KNOWN_ENTRIES_PER_SOURCE):
+    """Hashes and GUIDs of the headlines most recently stored from `source_url`, for early stopping."""
+    c = get_connection().execute("SELECT headline_hash, guid FROM headlines WHERE source_url = ? ORDER BY created_ts DESC LIMIT ?",
+                                 (source_url, limit))
+    rows = c.fetchall()
+    return {row[0] for row in rows}, {row[1] for row in rows if row[1]}
+
+def _empty_result(url=None):
+    return {'candidates': None, 'guids': {}, 'total_items': 0, 'method': None, 'unchanged': False, 'drained': True,
+            'validators': None, 'outcome': 'network_error', 'status': None, 'latency_ms': None,
+            'fetched_url': url, 'discovery_checked': False, 'discovered_feed': None, 'failed_feed': None}
+
+def fetch_source(url, run_counter, cached=None, known=None, attempts=FETCH_ATTEMPTS, discover=False, max_items=MAX_ITEMS_PER_SOURCE):
+    """Download one source once and parse it without touching the database.
+
+    Returns a dict with the candidate headlines (None when the source could not be read) and
+    their feed GUIDs, the item count, the parser used, whether the source is unchanged since
+    `cached`, whether the body was parsed to the end, the validators to store once its headlines
+    are processed, and the outcome, HTTP status and latency for modules/source_health.py.
+    `known` is the (hashes, guids) pair of get_known_entries(); feeds and pages stop being read
+    once they yield MAX_NEW_PER_SOURCE unknown headlines. With `discover`, a scraped page is also
+    searched for an advertised feed (discovered_feed).
+    Runs on the fetch pool, so it must stay free of shared state; parsing goes to modules/parse_pool.py.
+    """
+    result = _empty_result(url)
+    known_hashes, known_guids = known or (set(), set())
+    # Retries only cover failed downloads; a body that arrived is parsed exactly once
+    for attempt in range(attempts):
+        started = time.monotonic()
+        try:
+            logging.info(f"Run {run_counter}: Fetching {url}")
+            response, unchanged = _download(url, cached)
+            result.update(status=response.status_code, latency_ms=int((time.monotonic() - started) * 1000))
+            break
+        except Exception as e:
+            status = getattr(getattr(e, 'response', None), 'status_code', None)
+            result.update(outcome='http_error' if status else 'network_error', status=status,
+                          latency_ms=int((time.monotonic() - started) * 1000))
+            logging.error(f"Run {run_counter}: Download attempt {attempt + 1} failed for {url}: {e}")
+            if attempt == attempts - 1:
+                logging.error(f"Run {run_counter}: All download attempts failed for {url}")
+                return result
+            time.sleep(random.uniform(5, 10))
+    if unchanged:
+        result.update(unchanged=True, outcome='unchanged')
+        return result
+
+    etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+    try:
+        chunks = response.iter_content(STREAM_CHUNK_SIZE)
+        consumed = [next(chunks, b'')]
+        if is_feed(response.headers, consumed[0]):
+            def recorded():
+                yield consumed[0]
+                for chunk in chunks:
+                    consumed.append(chunk)
+                    yield chunk
+            try:
+                candidates, guids, total_items, drained, exhausted = read_feed(recorded(), max_items, known_hashes, known_guids, MAX_NEW_PER_SOURCE)
+            except ET.ParseError as e:
+                logging.info(f"Run {run_counter}: Streaming parse of {url} failed ({e}), using feedparser")
+                content = b''.join(consumed) + b''.join(chunks)
+                candidates, guids, total_items = run_parser(parse_feed, content, dict(response.headers), max_items)
+                drained, exhausted = True, True
+            if total_items:
+                # A feed read only up to old or enough new entries has no full-body hash to compare next time
+                content_hash = body_hash(b''.join(consumed)) if exhausted else None
+                result.update(candidates=candidates, guids=guids, total_items=total_items, method="RSS", drained=drained,
+                              validators=(etag, last_modified, content_hash), outcome='parsed')
+                return result
+            logging.info(f"Run {run_counter}: No RSS entries in {url}, parsing it as HTML")
+        content = b''.join(consumed) + b''.join(chunks)
+        content_hash = body_hash(content)
+        if cached is not None and cached['body_hash'] == content_hash:
+            result.update(unchanged=True, outcome='unchanged')
+            if discover:  # Only the head is parsed, cheap enough for this thread
+                result.update(discovery_checked=True, discovered_feed=find_feed_link(content, url))
+            return result
+        # BeautifulSoup runs in a parse worker; only the headline strings come back
+        candidates, total_items, drained, feed_link = run_parser(parse_page, content, url, max_items, known_hashes,
+                                                                 MAX_NEW_PER_SOURCE, discover)
+        result.update(candidates=candidates, total_items=total_items, method="scraping", drained=drained,
+                      validators=(etag, last_modified, content_hash), outcome='parsed',
+                      discovery_checked=discover, discovered_feed=feed_link)
+    except requests.RequestException as e:
+        result['outcome'] = 'network_error'
+        logging.error(f"Run {run_counter}: Reading {url} failed: {e}")
+    except Exception as e:
+        result['outcome'] = 'parse_error'
+        logging.error(f"Run {run_counter}: Parsing {url} failed: {e}")
+    finally:
+        response.close()  # Stops reading a feed that ended early
+    return result
+
+def fetch_source_or_feed(url, run_counter, feed_entry=None, cache=None, known=None, attempts=FETCH_ATTEMPTS):
+    """Fetch the feed discovered for page `url` if there is one; fall back to scraping the page itself.
+
+    `feed_entry` is the load_feed_map() row of `url`: None before the first successful poll,
+    (url, ts) for a source that is a feed itself, (None, ts) for a page without one.
+    """
+    cache = cache or {}
+    feed_url = feed_entry[0] if feed_entry else None
+    if feed_url == url:
+        return fetch_source(url, run_counter, cache.get(url), known, attempts)
+    if feed_url:
+        result = fetch_source(feed_url, run_counter, cache.get(feed_url), known, attempts)
+        if result['unchanged'] or result['method'] == "RSS":
+            return result
+        logging.info(f"Run {run_counter}: Feed {feed_url} discovered for {url} failed ({result['outcome']}), scraping the page")
+    discover = bool(feed_url) or needs_discovery(feed_entry)
+    # A page known to be HTML is rediscovered from its body, so a 304 must not skip the download
+    cached = None if discover and feed_entry else cache.get(url)
+    result = fetch_source(url, run_counter, cached, known, attempts, discover=discover)
+    result['failed_feed'] = feed_url
+    return result
+
+def fetch_all_sources(urls, run_counter, concurrency=DEFAULT_FETCH_CONCURRENCY, cache=None, known=None, half_open=(), feeds=None):
+    """Fetch every source in parallel; returns {url: fetch_source() result}.
+
+    Wall time is bounded by the slowest source rather than the sum of all of them.
+    Sources in `half_open` get a single trial download without retries. `feeds` is the
+    load_feed_map() of the sources: pages with a discovered feed are read through it.
+    """
+    cache, known, feeds = cache or {}, known or {}, feeds or {}
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(urls))), thread_name_prefix="headline-fetch") as pool:
+        futures = {pool.submit(fetch_source_or_feed, url, run_counter, feeds.get(url), cache, known.get(url),
+                               1 if url in half_open else FETCH_ATTEMPTS): url for url in urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                results[url] = future.result()
+            except Exception as e:
+                logging.error(f"Run {run_counter}: Fetching {url} failed: {e}")
+                results[url] = _empty_result(url)
+    return results
 
 def fetch_and_save_headlines(settings):
-    init_db()
     run_counter = get_and_increment_run_counter()
     total_new = 0
 
@@ -90,106 +300,94 @@ def fetch_and_save_headlines(settings):
         logging.info("No content sources provided, skipping headline fetch.")
         return
 
-    logging.info(f"Run {run_counter}: Fetching headlines...")
-    for url in settings['content_sources']:
-        fetched = 0
-        new_headlines = []
-        max_items = 100
-        skip_count = 0
+    urls, waiting = get_due_sources(list(dict.fromkeys(settings['content_sources'])))
+    if waiting:
+        logging.info(f"Run {run_counter}: Skipping {len(waiting)} sources not due for polling yet")
+    urls, half_open, blocked = check_breakers(urls)
+    if blocked:
+        logging.info(f"Run {run_counter}: Skipping {len(blocked)} sources with an open circuit breaker")
+    if not urls:
+        logging.info(f"Run {run_counter}: No content sources due, skipping headline fetch")
+        return
+    concurrency = settings.get('fetch_concurrency', DEFAULT_FETCH_CONCURRENCY)
+    configure_parse_pool(settings.get('parse_workers', DEFAULT_PARSE_WORKERS))
+    logging.info(f"Run {run_counter}: Fetching headlines from {len(urls)} sources ({min(concurrency, len(urls))} at a time)...")
+    threshold = settings.get('near_duplicate_threshold', NEAR_DUPLICATE_THRESHOLD)
+    prune_near_duplicate_index(get_connection())
+    known = {url: get_known_entries(url) for url in urls}
+    feeds = load_feed_map(urls)
+    cache = load_source_cache(urls + [feed_url for feed_url, _ in feeds.values() if feed_url])
+    results = fetch_all_sources(urls, run_counter, concurrency, cache, known, half_open, feeds)
 
-        # Try RSS first
-        try:
-            logging.info(f"Run {run_counter}: Attempting RSS fetch from {url}")
-            feed = feedparser.parse(url)
-            if feed.entries:
-                total_items = len(feed.entries)
-                for entry in feed.entries[:min(max_items, total_items)]:
-                    headline = entry.title.strip()
-                    if headline_exists(headline):
-                        skip_count += 1
-                        continue
-                    new_headlines.append(headline)
-                    fetched += 1
-                    if fetched >= 10:
-                        break
-                logging.info(f"Run {run_counter}: Fetched {fetched} new headlines from RSS {url} (skipped {skip_count} duplicates, checked {fetched + skip_count}/{total_items} items)")
-            else:
-                raise Exception("No RSS entries found, falling back to scraping")
-        except Exception as e:
-            logging.info(f"Run {run_counter}: RSS fetch failed for {url} ({e}), trying web scraping")
-
-            # Enhanced web scraping with retries and better HTML parsing
-            for attempt in range(3):
-                try:
-                    headers = {
-                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-                    }
-                    response = requests.get(url, headers=headers, timeout=10)
-                    response.raise_for_status()
-                    soup = BeautifulSoup(response.content, 'html.parser')  # Use html.parser for modern sites
-
-                    # Look for common headline tags
-                    headline_tags = soup.find_all(['h1', 'h2', 'h3', 'a'], class_=['title', 'headline', 'post-title', 'entry-title', 'news-title'])
-                    if not headline_tags:
-                        # Fallback to any text in article-like elements
-                        headline_tags = soup.select('article h1, article h2, .post h1, .post h2, .entry h1, .entry h2')
-                    
-                    total_items = len(headline_tags)
-                    for tag in headline_tags[:min(max_items, total_items)]:
-                        headline = tag.get_text(strip=True)
-                        if not headline or len(headline) < 10:  # Skip empty or too-short headlines
-                            continue
-                        if headline_exists(headline):
-                            skip_count += 1
-                            continue
-                        new_headlines.append(headline)
-                        fetched += 1
-                        if fetched >= 10:
-                            break
-                    
-                    total_checked = fetched + skip_count
-                    logging.info(f"Run {run_counter}: Fetched {fetched} new headlines from {url} via scraping (skipped {skip_count} duplicates, checked {total_checked}/{total_items} items)")
-                    
-                    if fetched == 0 and total_checked >= total_items:
-                        logging.warning(f"Run {run_counter}: No new headlines from {url}, exhausted {total_items} items")
-                    elif fetched == 0 and total_checked >= max_items:
-                        logging.warning(f"Run {run_counter}: No new headlines from {url} after checking {max_items} items")
-                    
-                    break
-                except Exception as e:
-                    logging.error(f"Run {run_counter}: Scraping attempt {attempt + 1} failed for {url}: {e}")
-                    time.sleep(random.uniform(5, 10))
-                    if attempt == 2:
-                        logging.error(f"Run {run_counter}: All scraping attempts failed for {url}")
+    # Dedupe and save on this thread once everything is in, in the configured source order
+    unchanged = 0
+    for url in urls:
+        result = results[url]
+        if result['failed_feed']:
+            forget_feed_url(url)
+        mapped = (feeds.get(url) or (None,))[0]
+        if result['method'] == "RSS" and result['fetched_url'] == url and mapped != url:
+            save_feed_url(url, url)  # The source is a feed itself: no discovery, validators stay in use
+        elif result['method'] == "scraping" and mapped == url:
+            forget_feed_url(url)  # Used to be a feed, look for an advertised one next time
+        if result['discovery_checked'] and result['outcome'] in ('parsed', 'unchanged'):
+            # A page still advertising the feed that just failed is treated as having none until the next recheck
+            feed_url = result['discovered_feed'] if result['discovered_feed'] != result['failed_feed'] else None
+            save_feed_url(url, feed_url)
+            if feed_url:
+                logging.info(f"Run {run_counter}: {url} advertises the feed {feed_url}, using it from the next poll")
+        if result['unchanged']:
+            unchanged += 1
+            logging.info(f"Run {run_counter}: {url} unchanged since last fetch, skipped parsing")
+            record_poll(url, 0)
+            record_fetch(url, 'unchanged', result['status'], result['latency_ms'])
+            continue
+        candidates, total_items, method = result['candidates'], result['total_items'], result['method']
+        if not candidates:
+            record_poll(url, 0, failed=True)
+            record_fetch(url, result['outcome'] if candidates is None else 'empty', result['status'], result['latency_ms'])
+            if candidates is not None:
+                logging.warning(f"Run {run_counter}: No headlines found in {url} via {method}")
+            continue
+        new_headlines, skip_count, near_count = select_new_headlines(candidates, threshold=threshold)
+        fetched = len(new_headlines)
+        total_checked = fetched + skip_count + near_count
+        logging.info(f"Run {run_counter}: Fetched {fetched} new headlines from {url} via {method} (skipped {skip_count} duplicates and {near_count} near-duplicates, checked {total_checked}/{total_items} items)")
+        if fetched == 0 and total_checked >= total_items:
+            logging.warning(f"Run {run_counter}: No new headlines from {url}, exhausted {total_items} items")
+        elif fetched == 0 and total_checked >= MAX_ITEMS_PER_SOURCE:
+            logging.warning(f"Run {run_counter}: No new headlines from {url} after checking {MAX_ITEMS_PER_SOURCE} items")
 
         if new_headlines:
-            new_saved = save_headlines(new_headlines, url, run_counter)
+            new_saved, skipped = save_headlines(new_headlines, url, run_counter, result['guids'])
             total_new += new_saved
-            logging.info(f"Run {run_counter}: Saved {new_saved} new headlines from {url} to {DB_PATH}")
+            logging.info(f"Run {run_counter}: Saved {new_saved} new headlines from {url} to {DB_PATH} ({skipped} already stored)")
+        # Only a fully drained body may be skipped next time; a capped one still holds unsaved headlines
+        if fetched < MAX_NEW_PER_SOURCE and result['drained'] and result['validators']:
+            save_source_cache(result['fetched_url'], *result['validators'])
+        record_fetch(url, 'new' if fetched else 'quiet', result['status'], result['latency_ms'], fetched)
+        interval = record_poll(url, fetched)
+        logging.debug(f"Run {run_counter}: Next poll of {url} in {interval // 60} minutes")
 
+    if total_new:
+        update_headline_scores(settings)
     if total_new == 0:
-        logging.info(f"Run {run_counter}: No new headlines saved across all sources")
+        logging.info(f"Run {run_counter}: No new headlines saved across all sources ({unchanged} unchanged)")
     else:
-        logging.info(f"Run {run_counter}: Total saved {total_new} new headlines to {DB_PATH}")
+        logging.info(f"Run {run_counter}: Total saved {total_new} new headlines to {DB_PATH} ({unchanged} sources unchanged)")
 
 def get_unused_headlines(limit=50):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT headline FROM headlines WHERE posted = 0 ORDER BY timestamp DESC LIMIT ?", (limit,))
-    headlines = [row[0] for row in c.fetchall()]
-    conn.close()
-    return headlines
+    """Unused headlines, best ranked first (see modules/headline_ranking.py)."""
+    c = get_connection().execute("SELECT headline FROM headlines WHERE posted = 0 ORDER BY score DESC LIMIT ?", (limit,))
+    return [row[0] for row in c.fetchall()]
 
 def mark_headline_posted(headline):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("UPDATE headlines SET posted = 1 WHERE headline = ?", (headline,))
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        conn.execute("UPDATE headlines SET posted = 1 WHERE headline_hash = ?", (headline_hash(headline),))
 
 if __name__ == "__main__":
     logging.info("Starting headline fetcher in standalone mode...")
-    init_db()
+    run_migrations()
     test_settings = {
         'content_sources': ["https://www.morgenpost.de/feed.rss", "https://www.visitberlin.de/en/whats-on-berlin"]
     }
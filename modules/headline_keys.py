@@ -0,0 +1,13 @@
+import hashlib
+import unicodedata
+
+def normalize_headline(headline):
+    """Canonical form used for dedupe: NFKC, casefolded, punctuation dropped, whitespace collapsed."""
+    text = unicodedata.normalize('NFKC', headline).casefold()
+    text = ''.join(' ' if unicodedata.category(ch).startswith('P') else ch for ch in text)
+    return ' '.join(text.split())
+
+def headline_hash(headline):
+    """Signed 64-bit content hash of the normalized headline, stored in headlines.headline_hash."""
+    digest = hashlib.blake2b(normalize_headline(headline).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
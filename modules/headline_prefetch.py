@@ -0,0 +1,20 @@
+from modules.background_worker import BackgroundWorker
+from modules.headline_fetcher import fetch_and_save_headlines
+
+# Minutes between prefetch passes, overridable through settings['prefetch_interval'].
+# Each pass only polls the sources that are due (modules/source_schedule.py), so ticking often is cheap.
+DEFAULT_PREFETCH_INTERVAL = 10
+
+_prefetcher = BackgroundWorker("headline-prefetch", "Headline prefetch", fetch_and_save_headlines,
+                               lambda settings: settings.get('prefetch_interval', DEFAULT_PREFETCH_INTERVAL))
+
+def start_prefetcher(settings):
+    """Fetch headlines in the background on their own cadence; the bot loop only reads them.
+
+    Calling it again swaps in new settings and triggers an immediate pass.
+    """
+    _prefetcher.start(settings)
+
+def stop_prefetcher(timeout=30):
+    """Stop the worker after its current pass, e.g. when research is disabled or on shutdown."""
+    _prefetcher.stop(timeout)
@@ -0,0 +1,58 @@
+import hashlib
+import logging
+import math
+from modules.memories_db import get_connection
+from modules.content_search import build_match_query, has_fts_index, query_terms
+from modules.headline_keys import normalize_headline
+
+PROFILE_MAX_TERMS = 64  # Profile words used in the ranking query
+# Freshness vs relevance: a headline this many seconds newer outranks one with twice its relevance
+FRESHNESS_HALF_LIFE = 24 * 3600
+
+def ranking_profile(settings):
+    """Text the headlines are ranked against: personality, self-update topics and search keywords."""
+    parts = [settings.get('personality_description', '')]
+    parts += settings.get('self_update_topics', []) + settings.get('search_keywords', [])
+    return " ".join(part for part in parts if part)
+
+def headline_score(relevance, created_ts):
+    """log2(1 + relevance) plus age in half-lives, so ORDER BY score matches a time-decayed relevance."""
+    return math.log2(1 + relevance) + (created_ts or 0) / FRESHNESS_HALF_LIFE
+
+def _relevance(conn, profile, rows):
+    """{headline id: relevance >= 0}: BM25 against the profile, or term overlap without FTS5."""
+    if not rows:
+        return {}
+    if has_fts_index('headlines'):
+        match = build_match_query(profile, PROFILE_MAX_TERMS)
+        if match is None:
+            return {}
+        wanted = {row[0] for row in rows}
+        # bm25() is negative, better matches lower; rowid bound keeps incremental passes to the new rows
+        c = conn.execute("SELECT rowid, bm25(headlines_fts) FROM headlines_fts WHERE headlines_fts MATCH ? AND rowid >= ?",
+                         (match, min(wanted)))
+        return {rowid: -rank for rowid, rank in c.fetchall() if rowid in wanted}
+    terms = set(query_terms(profile, PROFILE_MAX_TERMS))
+    return {row_id: len(terms & set(normalize_headline(headline or '').split())) for row_id, headline, _ in rows}
+
+def update_headline_scores(settings):
+    """Store a ranking score on unused headlines; returns how many rows were scored.
+
+    Only unscored rows are touched, unless the profile changed since the last pass,
+    in which case every unused headline is rescored.
+    """
+    profile = ranking_profile(settings)
+    profile_hash = hashlib.blake2b(profile.encode('utf-8'), digest_size=8).hexdigest()
+    conn = get_connection()
+    row = conn.execute("SELECT profile_hash FROM headline_ranking WHERE id = 1").fetchone()
+    rescore = row is None or row[0] != profile_hash
+    scope = "posted = 0" if rescore else "posted = 0 AND score IS NULL"
+    rows = conn.execute(f"SELECT id, headline, created_ts FROM headlines WHERE {scope}").fetchall()
+    relevance = _relevance(conn, profile, rows)
+    with conn:
+        conn.executemany("UPDATE headlines SET score = ? WHERE id = ?",
+                         [(headline_score(relevance.get(row_id, 0), created_ts), row_id) for row_id, _, created_ts in rows])
+        conn.execute("INSERT OR REPLACE INTO headline_ranking (id, profile_hash) VALUES (1, ?)", (profile_hash,))
+    if rescore:
+        logging.info(f"Ranked {len(rows)} unused headlines against the personality profile")
+    return len(rows)
@@ -0,0 +1,152 @@
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup, SoupStrainer, UnicodeDammit
+from modules.headline_keys import headline_hash
+
+try:
+    from lxml import etree  # Optional, roughly 5x faster tokenizer than html.parser
+    HTML_PARSER = 'lxml'
+except ImportError:
+    etree = None
+    HTML_PARSER = 'html.parser'
+
+MIN_HEADLINE_LENGTH = 10  # Skip empty or too-short headlines
+TITLE_TAGS = ['h1', 'h2', 'h3', 'a']
+TITLE_CLASSES = ['title', 'headline', 'post-title', 'entry-title', 'news-title']
+STREAM_CHUNK_SIZE = 16 * 1024  # Characters fed to the incremental parser between quota checks
+
+def _class_pattern(classes):
+    # Strainers see the raw class attribute ("title big"), so match whole words instead of list items
+    return re.compile(r'(^|\s)(' + '|'.join(map(re.escape, classes)) + r')(\s|$)')
+
+# Only these elements (and their subtrees) are built into a tree; everything else is tokenized and dropped
+HEADLINE_STRAINER = SoupStrainer(TITLE_TAGS, class_=_class_pattern(TITLE_CLASSES))
+# Used when a page has no title-classed headings: (container strainer, selector run inside it)
+CONTAINER_STRAINERS = [
+    (SoupStrainer('article'), 'article h1, article h2'),
+    (SoupStrainer(class_=_class_pattern(['post', 'entry'])), '.post h1, .post h2, .entry h1, .entry h2'),
+]
+
+def find_headline_tags(content):
+    """Candidate headline elements of an HTML body, parsing only the elements that can match."""
+    soup = BeautifulSoup(content, HTML_PARSER, parse_only=HEADLINE_STRAINER)
+    tags = soup.find_all(TITLE_TAGS, class_=TITLE_CLASSES)
+    if tags:
+        return tags
+    # Fallback to headings inside article-like elements
+    for strainer, selector in CONTAINER_STRAINERS:
+        soup = BeautifulSoup(content, HTML_PARSER, parse_only=strainer)
+        tags.extend(soup.select(selector))
+    return tags
+
+def _is_title_tag(tag, classes):
+    return tag in TITLE_TAGS and any(name in TITLE_CLASSES for name in (classes or '').split())
+
+class _HeadlineScanner(HTMLParser):
+    """html.parser fallback of _iter_headline_texts: collects the text of title-classed tags as they close."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.open = []  # [tag, text parts] of the title tags being read
+        self.done = []
+
+    def handle_starttag(self, tag, attrs):
+        if _is_title_tag(tag, dict(attrs).get('class')):
+            self.open.append([tag, []])
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.open) - 1, -1, -1):
+            if self.open[i][0] == tag:
+                self.done.append("".join(self.open.pop(i)[1]))
+                break
+
+    def handle_data(self, data):
+        data = data.strip()
+        if data:
+            for _, parts in self.open:
+                parts.append(data)
+
+def _iter_headline_texts(content):
+    """Yield the text of each title-classed headline tag while the body is fed in chunks.
+
+    Closing the generator stops parsing, so the rest of the page is never tokenized.
+    """
+    markup = UnicodeDammit(content, is_html=True).unicode_markup or ''
+    if etree is not None:
+        parser = etree.HTMLPullParser(events=('end',))
+        def events():
+            for _, elem in parser.read_events():
+                if _is_title_tag(elem.tag, elem.get('class')):
+                    yield "".join(text.strip() for text in elem.itertext())
+    else:
+        parser = _HeadlineScanner()
+        def events():
+            done, parser.done = parser.done, []
+            yield from done
+    for start in range(0, len(markup), STREAM_CHUNK_SIZE):
+        parser.feed(markup[start:start + STREAM_CHUNK_SIZE])
+        yield from events()
+    parser.close()
+    yield from events()
+
+def _extract_until_quota(content, max_items, known, limit):
+    """extract_headlines() for a quota: parse only up to the tag that completes `limit` unknown headlines."""
+    candidates = []
+    fresh = set()
+    seen = 0
+    texts = _iter_headline_texts(content)
+    try:
+        for text in texts:
+            seen += 1
+            if len(text) >= MIN_HEADLINE_LENGTH:
+                candidates.append(text)
+                key = headline_hash(text)
+                if key not in known:
+                    fresh.add(key)
+                    if len(fresh) >= limit:
+                        return candidates, seen, False
+            if seen >= max_items:
+                return candidates, seen, True
+    finally:
+        texts.close()
+    if seen:
+        return candidates, seen, True
+    return extract_headlines(content, max_items)  # No title-classed headings: article containers need the full page
+
+def extract_headlines(content, max_items, known=None, limit=None):
+    """Headline texts of an HTML body; returns (candidates, total_items, drained).
+
+    With `known` (hashes of headlines already stored for this source) and `limit`, the body is
+    parsed incrementally and parsing stops as soon as `limit` unknown headlines were found;
+    `drained` is then False and total_items counts the tags read so far.
+    """
+    if known is not None and limit:
+        return _extract_until_quota(content, max_items, known, limit)
+    tags = find_headline_tags(content)
+    candidates = []
+    for tag in tags[:max_items]:
+        text = tag.get_text(strip=True)
+        if len(text) >= MIN_HEADLINE_LENGTH:
+            candidates.append(text)
+    return candidates, len(tags), True
+
+FEED_TYPES = ('application/rss+xml', 'application/atom+xml', 'application/rdf+xml')
+_HEAD_END = re.compile(rb'</head\s*>', re.IGNORECASE)
+
+def parse_page(content, base_url, max_items, known=None, limit=None, discover=False):
+    """extract_headlines() plus, with `discover`, find_feed_link(); one call for a parse worker."""
+    candidates, total_items, drained = extract_headlines(content, max_items, known, limit)
+    return candidates, total_items, drained, find_feed_link(content, base_url) if discover else None
+
+def find_feed_link(content, base_url):
+    """Absolute URL of the first <link rel="alternate"> RSS/Atom feed advertised in the page head, or None."""
+    head_end = _HEAD_END.search(content)
+    soup = BeautifulSoup(content[:head_end.end()] if head_end else content, HTML_PARSER, parse_only=SoupStrainer('link'))
+    for link in soup.find_all('link', href=True):
+        rel = link.get('rel') or []
+        rel = rel.split() if isinstance(rel, str) else rel
+        feed_type = (link.get('type') or '').split(';')[0].strip().lower()
+        if 'alternate' in (r.lower() for r in rel) and feed_type in FEED_TYPES:
+            return urljoin(base_url, link['href'])
+    return None
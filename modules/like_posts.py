@@ -5,49 +5,35 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-import sqlite3
 from datetime import datetime
-import os
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException, ElementClickInterceptedException
+from modules.memories_db import get_daily_count
+from modules.write_queue import enqueue_write, flush_writes
+from modules.seen_cache import SeenIds
 
 # Hardcoded constants
 DELAY_MIN = 1
 DELAY_MAX = 5
 SCROLL_ATTEMPTS = 5
 
-# Configuration
-DB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Database")
-DB_PATH = os.path.join(DB_DIR, "memories.db")
-
-# SQLite Database Setup for Liked Posts
-def init_likes_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS likes 
-                 (id INTEGER PRIMARY KEY, post_id TEXT UNIQUE, liked_at TEXT)''')
-    conn.commit()
-    conn.close()
+# Liked posts (schema lives in modules/migrations.py)
+liked_posts = SeenIds('likes', 'post_id')
 
 def save_like(post_id):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("INSERT OR IGNORE INTO likes (post_id, liked_at) VALUES (?, ?)", 
-              (post_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-    rows_affected = conn.total_changes
-    conn.commit()
-    conn.close()
-    return rows_affected > 0
+    """Record a like via the write-behind queue; returns False if the post was already liked."""
+    is_new = post_id not in liked_posts
+    now = datetime.now()
+    enqueue_write("INSERT OR IGNORE INTO likes (post_id, liked_at, created_ts) VALUES (?, ?, ?)", 
+                  (post_id, now.strftime("%Y-%m-%d %H:%M:%S"), int(now.timestamp())))
+    liked_posts.add(post_id)
+    return is_new
 
-def get_likes_count_today():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    today = datetime.now().strftime("%Y-%m-%d")
-    c.execute("SELECT COUNT(*) FROM likes WHERE liked_at LIKE ?", (f"{today}%",))
-    count = c.fetchone()[0]
-    conn.close()
-    return count
+def is_post_liked(post_id):
+    return post_id in liked_posts
 
-init_likes_db()
+def get_likes_count_today():
+    flush_writes()
+    return get_daily_count('like')
 
 def like_posts(driver, settings):
     """Like posts based on user-defined keywords, respecting daily limit."""
@@ -134,12 +120,7 @@ def like_posts(driver, settings):
                             post_id = f"tweet_{int(time.time()*1000)}_{random.randint(1, 10000)}"
                             logging.warning(f"Using fallback post_id: {post_id}")
 
-                        conn = sqlite3.connect(DB_PATH)
-                        c = conn.cursor()
-                        c.execute("SELECT COUNT(*) FROM likes WHERE post_id = ?", (post_id,))
-                        already_liked = c.fetchone()[0] > 0
-                        conn.close()
-                        if already_liked:
+                        if is_post_liked(post_id):
                             logging.info(f"Skipping already liked post {post_id}")
                             continue
 
@@ -0,0 +1,37 @@
+import logging
+import threading
+import openai
+import google.generativeai as genai
+
+GEMINI_MODEL = 'gemini-1.5-flash'
+
+_clients = {}  # (api_type, api_key) -> client
+_clients_lock = threading.Lock()
+
+def _build_client(api_type, api_key):
+    if api_type == 'openai':
+        return openai.OpenAI(api_key=api_key)
+    genai.configure(api_key=api_key)  # gemini
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+def get_api_client(settings):
+    """Client for the configured API, shared for the life of the process.
+
+    Reusing it keeps its HTTP connections and TLS sessions alive between calls; a new one is
+    only built when the key changes. Both clients are safe to use from several threads.
+    """
+    key = (settings['api_type'], settings['api_key'])
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is not None:
+            return client
+        client = _build_client(*key)
+        # genai keeps a single global key, so only the latest client per API type stays usable.
+        # The replaced one is only dropped, not closed: a comment draft or the tweet drafter may
+        # still be mid-request on it, and it is garbage-collected once they let go of it.
+        replaced = [old for old in _clients if old[0] == key[0]]
+        for old in replaced:
+            del _clients[old]
+        _clients[key] = client
+    logging.info(f"{key[0].capitalize()} API client {'rebuilt for the new key' if replaced else 'created'}")
+    return client
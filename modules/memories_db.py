@@ -0,0 +1,84 @@
+import sqlite3
+import os
+import logging
+import threading
+import weakref
+from datetime import date
+
+# Configuration
+DB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Database")
+DB_PATH = os.path.join(DB_DIR, "memories.db")
+ARCHIVE_DB_PATH = os.path.join(DB_DIR, "memories_archive.db")  # Rows moved out by modules/retention.py
+
+# Connection tuning
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KB = 8000  # Negative cache_size in SQLite means KiB instead of pages
+STATEMENT_CACHE_SIZE = 256  # Prepared statements kept per connection
+
+_local = threading.local()
+_connections = set()
+_connections_lock = threading.Lock()
+
+def _configure_connection(conn):
+    """Apply WAL journaling and the pragmas shared by every connection to memories.db."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, skips the fsync on every commit
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+def _release_connection(conn):
+    """Close a pooled connection whose thread has exited (unless close_connections() got there first)."""
+    with _connections_lock:
+        if conn not in _connections:
+            return
+        _connections.discard(conn)
+    try:
+        conn.close()
+    except sqlite3.Error as e:
+        logging.warning(f"Failed to close database connection: {e}")
+
+class _ConnectionHolder:
+    """Thread-local owner of a pooled connection; closes it once the thread's locals are gone."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        weakref.finalize(self, _release_connection, conn)
+
+def get_connection():
+    """Return the calling thread's long-lived connection to memories.db.
+
+    Each thread gets its own connection, opened once and reused for the life of the
+    thread, so callers never pay connect/pragma cost per query. Use it as a context
+    manager (`with get_connection() as conn:`) to commit or roll back a transaction;
+    the connection itself stays open.
+    """
+    holder = getattr(_local, "holder", None)
+    conn = holder.conn if holder else None
+    if conn is None or conn not in _connections:  # Not opened yet, or closed by close_connections()
+        os.makedirs(DB_DIR, exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000,
+                               cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+        _configure_connection(conn)
+        _local.holder = _ConnectionHolder(conn)
+        with _connections_lock:
+            _connections.add(conn)
+        logging.debug(f"Opened pooled connection to {DB_PATH} for thread {threading.current_thread().name}")
+    return conn
+
+def close_connections():
+    """Close every pooled connection, e.g. on shutdown."""
+    with _connections_lock:
+        for conn in _connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logging.warning(f"Failed to close database connection: {e}")
+        _connections.clear()
+    _local.__dict__.pop("holder", None)
+
+def get_daily_count(action, day=None):
+    """Return how many `action` rows were logged on `day` (a date, default today) from the rollup."""
+    day = (day or date.today()).isoformat()
+    row = get_connection().execute("SELECT count FROM daily_counts WHERE day = ? AND action = ?", (day, action)).fetchone()
+    return row[0] if row else 0
@@ -0,0 +1,371 @@
+import logging
+import ast
+import json
+from datetime import datetime
+from modules.memories_db import DB_PATH, get_connection
+from modules.headline_keys import headline_hash
+from modules.near_duplicates import NEAR_DUPLICATE_WINDOW_DAYS, index_headlines
+
+# Schema for memories.db, applied in order by run_migrations(). Each migration runs in its own
+# transaction and is recorded in schema_version; never edit a released migration, append a new one.
+# Migrations must tolerate databases created by the old import-time init_*_db() functions.
+
+def _column_names(conn, table):
+    return [col[1] for col in conn.execute(f"PRAGMA table_info({table})")]
+
+def _migration_1_baseline(conn):
+    """Tables previously created at import time by xlogin_db, headline_fetcher and the action modules."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS credentials (
+        username TEXT PRIMARY KEY,
+        password TEXT NOT NULL,
+        email TEXT NOT NULL,
+        api_type TEXT,  -- Can be NULL now, as we rely on api_keys table
+        api_key TEXT,   -- Can be NULL now
+        last_updated TEXT NOT NULL
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS personalities (
+        preset_name TEXT PRIMARY KEY,
+        settings TEXT NOT NULL,
+        last_updated TEXT NOT NULL
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS api_keys (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL,
+        custom_name TEXT NOT NULL,
+        api_type TEXT NOT NULL,
+        api_key TEXT NOT NULL,
+        last_updated TEXT NOT NULL,
+        UNIQUE(username, custom_name),
+        FOREIGN KEY(username) REFERENCES credentials(username)
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS headlines
+                    (id INTEGER PRIMARY KEY,
+                     headline TEXT UNIQUE,
+                     source_url TEXT,
+                     run_number INTEGER,
+                     timestamp TEXT,
+                     posted INTEGER DEFAULT 0)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS run_counter
+                    (id INTEGER PRIMARY KEY CHECK (id = 1),
+                     count INTEGER DEFAULT 0)''')
+    conn.execute("INSERT OR IGNORE INTO run_counter (id, count) VALUES (1, 0)")
+    conn.execute('''CREATE TABLE IF NOT EXISTS likes
+                    (id INTEGER PRIMARY KEY, post_id TEXT UNIQUE, liked_at TEXT)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS followed
+                    (id INTEGER PRIMARY KEY, username TEXT UNIQUE, followed_at TEXT)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS tweets
+                    (id INTEGER PRIMARY KEY, headline TEXT, text TEXT, timestamp TEXT)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS self_updates
+                    (id INTEGER PRIMARY KEY, text TEXT UNIQUE, timestamp TEXT)''')
+
+    comments_sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'comments'").fetchone()
+    if comments_sql is None:
+        conn.execute('''CREATE TABLE comments
+                        (id INTEGER PRIMARY KEY,
+                         post_id TEXT,
+                         username TEXT,
+                         comment_text TEXT,
+                         commented_at TEXT,
+                         UNIQUE(post_id, comment_text))''')
+    elif 'UNIQUE(post_id, comment_text)' not in comments_sql[0]:
+        # Legacy comments table: rebuild once with the UNIQUE constraint (SQLite can't add one in place)
+        logging.info("Adding UNIQUE constraint to comments table")
+        username_expr = "username" if 'username' in _column_names(conn, 'comments') else "NULL"
+        conn.execute('''CREATE TABLE comments_new
+                        (id INTEGER PRIMARY KEY,
+                         post_id TEXT,
+                         username TEXT,
+                         comment_text TEXT,
+                         commented_at TEXT,
+                         UNIQUE(post_id, comment_text))''')
+        conn.execute(f"INSERT OR IGNORE INTO comments_new (id, post_id, username, comment_text, commented_at) "
+                     f"SELECT id, post_id, {username_expr}, comment_text, commented_at FROM comments")
+        conn.execute("DROP TABLE comments")
+        conn.execute("ALTER TABLE comments_new RENAME TO comments")
+
+def _add_epoch_column(conn, table, text_column):
+    """Add an indexed epoch `created_ts` column, backfilled from the legacy TEXT timestamp in `text_column`."""
+    if 'created_ts' not in _column_names(conn, table):
+        logging.info(f"Adding 'created_ts' column to {table} table")
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN created_ts INTEGER")
+        conn.execute(f"UPDATE {table} SET created_ts = CAST(strftime('%s', {text_column}, 'utc') AS INTEGER) "
+                     f"WHERE {text_column} IS NOT NULL")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_created_ts ON {table}(created_ts)")
+
+def _add_action_log(conn, table, text_column, action):
+    """Give an action table an epoch `created_ts` column and keep the daily_counts rollup in sync.
+
+    An AFTER INSERT trigger bumps the (day, action) counter, so daily quota checks are a single
+    primary-key lookup no matter how large the table grows.
+    """
+    _add_epoch_column(conn, table, text_column)
+
+    trigger = f"trg_{table}_daily_count"
+    conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute(f'''CREATE TRIGGER {trigger} AFTER INSERT ON {table}
+                     WHEN NEW.created_ts IS NOT NULL
+                     BEGIN
+                         INSERT INTO daily_counts (day, action, count)
+                         VALUES (date(NEW.created_ts, 'unixepoch', 'localtime'), '{action}', 1)
+                         ON CONFLICT(day, action) DO UPDATE SET count = count + 1;
+                     END''')
+    conn.execute(f"INSERT OR REPLACE INTO daily_counts (day, action, count) "
+                 f"SELECT date(created_ts, 'unixepoch', 'localtime'), ?, COUNT(*) FROM {table} "
+                 f"WHERE created_ts IS NOT NULL GROUP BY 1", (action,))
+
+def _migration_2_action_timestamps(conn):
+    """Epoch timestamps on the action tables plus the daily_counts quota rollup."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS daily_counts
+                    (day TEXT NOT NULL,
+                     action TEXT NOT NULL,
+                     count INTEGER NOT NULL DEFAULT 0,
+                     PRIMARY KEY (day, action)) WITHOUT ROWID''')
+    _add_action_log(conn, 'likes', 'liked_at', 'like')
+    _add_action_log(conn, 'followed', 'followed_at', 'follow')
+    _add_action_log(conn, 'comments', 'commented_at', 'comment')
+    _add_action_log(conn, 'tweets', 'timestamp', 'post')
+
+def _migration_3_personality_json(conn):
+    """Re-encode personality presets from Python repr (parsed with ast.literal_eval) to JSON."""
+    rows = conn.execute("SELECT preset_name, settings FROM personalities").fetchall()
+    for preset_name, settings_text in rows:
+        try:
+            json.loads(settings_text)
+            continue  # Already JSON
+        except ValueError:
+            pass
+        try:
+            settings = ast.literal_eval(settings_text)
+        except (ValueError, SyntaxError) as e:
+            logging.warning(f"Leaving unreadable personality preset '{preset_name}' unconverted: {e}")
+            continue
+        conn.execute("UPDATE personalities SET settings = ? WHERE preset_name = ?",
+                     (json.dumps(settings, ensure_ascii=False), preset_name))
+    logging.info(f"Converted {len(rows)} personality preset(s) to JSON")
+
+def _migration_4_retention(conn):
+    """Epoch timestamps on headlines/self_updates and the seen_keys table that outlives archived rows."""
+    _add_epoch_column(conn, 'headlines', 'timestamp')
+    _add_epoch_column(conn, 'self_updates', 'timestamp')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_headlines_unused ON headlines(posted, created_ts)")
+    # Dedupe keys (post_ids, usernames, headlines) of rows moved to the archive database
+    conn.execute('''CREATE TABLE IF NOT EXISTS seen_keys
+                    (kind TEXT NOT NULL,
+                     key TEXT NOT NULL,
+                     PRIMARY KEY (kind, key)) WITHOUT ROWID''')
+
+def _migration_5_headline_hash(conn):
+    """Replace the full-text UNIQUE on headlines with a unique 64-bit hash of the normalized headline."""
+    conn.execute('''CREATE TABLE headlines_new
+                    (id INTEGER PRIMARY KEY,
+                     headline TEXT,
+                     headline_hash INTEGER NOT NULL UNIQUE,
+                     source_url TEXT,
+                     run_number INTEGER,
+                     timestamp TEXT,
+                     posted INTEGER DEFAULT 0,
+                     created_ts INTEGER)''')
+    # Keep the oldest row per normalized headline; it inherits `posted` from any duplicate
+    kept = {}
+    for row_id, headline, posted in conn.execute("SELECT id, headline, posted FROM headlines ORDER BY id"):
+        key = headline_hash(headline or '')
+        if key in kept:
+            kept[key][1] = max(kept[key][1], posted or 0)
+        else:
+            kept[key] = [row_id, posted or 0]
+    conn.execute("CREATE TEMP TABLE headline_hashes (id INTEGER PRIMARY KEY, headline_hash INTEGER, posted INTEGER)")
+    conn.executemany("INSERT INTO temp.headline_hashes (id, headline_hash, posted) VALUES (?, ?, ?)",
+                     [(row_id, key, posted) for key, (row_id, posted) in kept.items()])
+    conn.execute('''INSERT INTO headlines_new (id, headline, headline_hash, source_url, run_number, timestamp, posted, created_ts)
+                    SELECT h.id, h.headline, k.headline_hash, h.source_url, h.run_number, h.timestamp, k.posted, h.created_ts
+                    FROM headlines h JOIN temp.headline_hashes k ON k.id = h.id''')
+    conn.execute("DROP TABLE temp.headline_hashes")
+    conn.execute("DROP TABLE headlines")
+    conn.execute("ALTER TABLE headlines_new RENAME TO headlines")
+    conn.execute("CREATE INDEX idx_headlines_created_ts ON headlines(created_ts)")
+    conn.execute("CREATE INDEX idx_headlines_unused ON headlines(posted, created_ts)")
+
+    archived = conn.execute("SELECT key FROM seen_keys WHERE kind = 'headlines'").fetchall()
+    conn.execute("DELETE FROM seen_keys WHERE kind = 'headlines'")
+    conn.executemany("INSERT OR IGNORE INTO seen_keys (kind, key) VALUES ('headlines', ?)",
+                     [(str(headline_hash(key)),) for (key,) in archived])
+    logging.info(f"Keyed {len(kept)} headlines by normalized hash")
+
+# Source table -> text column mirrored into <table>_fts (external-content FTS5, kept in sync by triggers)
+FTS_SOURCES = {
+    'tweets': 'text',
+    'comments': 'comment_text',
+    'self_updates': 'text',
+    'headlines': 'headline',
+}
+
+FTS_TOKENIZE = 'unicode61 remove_diacritics 2'
+
+def fts5_available(conn):
+    return bool(conn.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0])
+
+def _migration_6_full_text_search(conn):
+    """FTS5 indexes over generated and fetched text, for topic lookups across the whole history.
+
+    Any later migration that rebuilds one of the FTS_SOURCES tables must recreate its triggers.
+    """
+    if not fts5_available(conn):
+        logging.warning("SQLite build lacks FTS5, content search will fall back to LIKE scans")
+        return
+    for table, column in FTS_SOURCES.items():
+        fts = f"{table}_fts"
+        conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                     f"{column}, content='{table}', content_rowid='id', tokenize='{FTS_TOKENIZE}')")
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+                             INSERT INTO {fts} (rowid, {column}) VALUES (NEW.id, NEW.{column});
+                         END""")
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+                             INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', OLD.id, OLD.{column});
+                         END""")
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {table} BEGIN
+                             INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', OLD.id, OLD.{column});
+                             INSERT INTO {fts} (rowid, {column}) VALUES (NEW.id, NEW.{column});
+                         END""")
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+def _migration_7_source_cache(conn):
+    """HTTP validators and body digest of the last fully processed download of each content source."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS source_cache
+                    (url TEXT PRIMARY KEY,
+                     etag TEXT,
+                     last_modified TEXT,
+                     body_hash TEXT,
+                     checked_ts INTEGER)''')
+
+def _migration_8_source_schedule(conn):
+    """Adaptive per-source polling state: when each source last yielded headlines and when it is next due."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS source_schedule
+                    (url TEXT PRIMARY KEY,
+                     last_polled_ts INTEGER,
+                     last_new_ts INTEGER,
+                     interval_s INTEGER NOT NULL,
+                     next_poll_ts INTEGER NOT NULL,
+                     failures INTEGER NOT NULL DEFAULT 0)''')
+
+def _migration_9_headline_source_index(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_headlines_source ON headlines(source_url, created_ts)")
+
+def _migration_10_near_duplicates(conn):
+    """MinHash LSH buckets of recent headlines for near-duplicate rejection at ingest.
+
+    Entries past the comparison window are pruned on each fetch, long before retention archives
+    their headlines; lookups join on headlines, so a stray entry can never match.
+    """
+    conn.execute('''CREATE TABLE IF NOT EXISTS headline_lsh
+                    (bucket INTEGER NOT NULL,
+                     headline_id INTEGER NOT NULL,
+                     created_ts INTEGER NOT NULL,
+                     PRIMARY KEY (bucket, headline_id)) WITHOUT ROWID''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_headline_lsh_created_ts ON headline_lsh(created_ts)")
+    cutoff = int(datetime.now().timestamp()) - NEAR_DUPLICATE_WINDOW_DAYS * 86400
+    rows = conn.execute("SELECT id, headline, created_ts FROM headlines WHERE created_ts >= ?", (cutoff,)).fetchall()
+    index_headlines(conn, rows)
+    logging.info(f"Indexed {len(rows)} recent headlines for near-duplicate checks")
+
+def _migration_11_headline_score(conn):
+    """Persisted ranking score for local headline selection (modules/headline_ranking.py)."""
+    if 'score' not in _column_names(conn, 'headlines'):
+        conn.execute("ALTER TABLE headlines ADD COLUMN score REAL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_headlines_rank ON headlines(posted, score)")
+    conn.execute('''CREATE TABLE IF NOT EXISTS headline_ranking
+                    (id INTEGER PRIMARY KEY CHECK (id = 1),
+                     profile_hash TEXT NOT NULL)''')
+
+def _migration_12_source_health(conn):
+    """Per-source fetch metrics and circuit breaker state (modules/source_health.py)."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS source_health
+                    (url TEXT PRIMARY KEY,
+                     polls INTEGER NOT NULL DEFAULT 0,
+                     failures_total INTEGER NOT NULL DEFAULT 0,
+                     headlines_total INTEGER NOT NULL DEFAULT 0,
+                     last_yield INTEGER,
+                     last_status INTEGER,
+                     last_outcome TEXT,
+                     last_latency_ms INTEGER,
+                     avg_latency_ms REAL,
+                     consecutive_failures INTEGER NOT NULL DEFAULT 0,
+                     breaker_state TEXT NOT NULL DEFAULT 'closed',
+                     open_until_ts INTEGER,
+                     cooldown_s INTEGER NOT NULL DEFAULT 3600,
+                     last_polled_ts INTEGER)''')
+
+def _migration_13_headline_guid(conn):
+    """Feed GUID of each headline, so the streaming feed reader can stop at entries it has seen."""
+    if 'guid' not in _column_names(conn, 'headlines'):
+        conn.execute("ALTER TABLE headlines ADD COLUMN guid TEXT")
+
+def _migration_14_feed_discovery(conn):
+    """Feed URL of each content source: advertised by an HTML page, NULL when it has none, itself for feeds."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS feed_discovery
+                    (source_url TEXT PRIMARY KEY,
+                     feed_url TEXT,
+                     checked_ts INTEGER NOT NULL)''')
+
+def _migration_15_pending_tweets(conn):
+    """Pre-generated tweet drafts waiting to be posted (modules/tweet_queue.py)."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS pending_tweets
+                    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     headline TEXT NOT NULL,
+                     tweet TEXT NOT NULL,
+                     settings_hash TEXT NOT NULL,
+                     created_ts INTEGER NOT NULL)''')
+
+MIGRATIONS = [
+    (1, "baseline schema", _migration_1_baseline),
+    (2, "action timestamps and daily counters", _migration_2_action_timestamps),
+    (3, "personality presets as JSON", _migration_3_personality_json),
+    (4, "retention timestamps and archived dedupe keys", _migration_4_retention),
+    (5, "normalized headline hash key", _migration_5_headline_hash),
+    (6, "full-text search indexes", _migration_6_full_text_search),
+    (7, "conditional GET cache per content source", _migration_7_source_cache),
+    (8, "adaptive source polling schedule", _migration_8_source_schedule),
+    (9, "headlines by source index", _migration_9_headline_source_index),
+    (10, "near-duplicate headline index", _migration_10_near_duplicates),
+    (11, "headline ranking score", _migration_11_headline_score),
+    (12, "source health and circuit breaker", _migration_12_source_health),
+    (13, "feed entry GUIDs", _migration_13_headline_guid),
+    (14, "feed auto-discovery cache", _migration_14_feed_discovery),
+    (15, "pre-generated tweet queue", _migration_15_pending_tweets),
+]
+
+_migrated = False
+
+def get_schema_version(conn=None):
+    conn = conn or get_connection()
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+def run_migrations():
+    """Bring memories.db up to the latest schema version. Call once at process start."""
+    global _migrated
+    if _migrated:
+        return
+    conn = get_connection()
+    with conn:
+        conn.execute('''CREATE TABLE IF NOT EXISTS schema_version
+                        (version INTEGER PRIMARY KEY,
+                         description TEXT NOT NULL,
+                         applied_at TEXT NOT NULL)''')
+    current = get_schema_version(conn)
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            migrate(conn)
+            conn.execute("INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                         (version, description, datetime.now().isoformat()))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logging.error(f"Migration {version} ({description}) failed, database left at version {current}")
+            raise
+        current = version
+        logging.info(f"Applied migration {version}: {description}")
+    _migrated = True
+    logging.info(f"Database {DB_PATH} at schema version {current}")
@@ -0,0 +1,78 @@
+import hashlib
+import time
+from modules.headline_keys import normalize_headline
+
+# MinHash LSH over the word sets of normalized headlines. With 10 bands of 3 rows a pair at
+# Jaccard 0.75 shares a bucket with ~99.6% probability, one at 0.3 with ~24%; candidates
+# are then checked exactly, so the bands only decide how much gets compared.
+LSH_BANDS = 10
+LSH_ROWS = 3
+NEAR_DUPLICATE_THRESHOLD = 0.75  # Word-set Jaccard at or above which a headline is the same story
+NEAR_DUPLICATE_WINDOW_DAYS = 14  # Only compare against headlines stored this recently
+# Shorter titles are never rejected as near-duplicates: one changed word (a name, a place)
+# already costs 8-token titles only ~0.22 Jaccard, so the threshold cannot tell stories apart
+NEAR_DUPLICATE_MIN_TOKENS = 10
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [(int.from_bytes(hashlib.blake2b(b'a%d' % i, digest_size=8).digest(), 'big') % _MERSENNE_PRIME or 1,
+                  int.from_bytes(hashlib.blake2b(b'b%d' % i, digest_size=8).digest(), 'big') % _MERSENNE_PRIME)
+                 for i in range(LSH_BANDS * LSH_ROWS)]
+
+def headline_tokens(headline):
+    return frozenset(normalize_headline(headline).split())
+
+def _token_hash(token):
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def lsh_buckets(tokens):
+    """One signed 64-bit bucket key per band for a token set (empty sets get none)."""
+    if not tokens:
+        return []
+    hashes = [_token_hash(token) for token in tokens]
+    signature = [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        packed = band.to_bytes(1, 'big') + b''.join(value.to_bytes(8, 'big') for value in rows)
+        buckets.append(int.from_bytes(hashlib.blake2b(packed, digest_size=8).digest(), 'big', signed=True))
+    return buckets
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+def is_near_duplicate(a, b, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """True when token sets `a` and `b` tell the same story.
+
+    Both need NEAR_DUPLICATE_MIN_TOKENS words, and titles differing in a number (score, date,
+    count, episode) are different stories however much of the wording they share.
+    """
+    if min(len(a), len(b)) < NEAR_DUPLICATE_MIN_TOKENS or jaccard(a, b) < threshold:
+        return False
+    return not any(char.isdigit() for token in a ^ b for char in token)
+
+def find_near_duplicate(conn, headline, threshold=NEAR_DUPLICATE_THRESHOLD, window_days=NEAR_DUPLICATE_WINDOW_DAYS):
+    """A recently stored headline telling the same story as `headline`, or None."""
+    tokens = headline_tokens(headline)
+    if len(tokens) < NEAR_DUPLICATE_MIN_TOKENS:
+        return None
+    buckets = lsh_buckets(tokens)
+    cutoff = int(time.time()) - window_days * 86400
+    placeholders = ",".join("?" * len(buckets))
+    rows = conn.execute(f"SELECT DISTINCT h.headline FROM headline_lsh l JOIN headlines h ON h.id = l.headline_id "
+                        f"WHERE l.bucket IN ({placeholders}) AND l.created_ts >= ?", buckets + [cutoff])
+    for (stored,) in rows:
+        if is_near_duplicate(tokens, headline_tokens(stored), threshold):
+            return stored
+    return None
+
+def index_headlines(conn, rows):
+    """Add (id, headline, created_ts) rows to the LSH index; call inside the inserting transaction."""
+    conn.executemany("INSERT OR IGNORE INTO headline_lsh (bucket, headline_id, created_ts) VALUES (?, ?, ?)",
+                     [(bucket, row_id, created_ts) for row_id, headline, created_ts in rows
+                      for bucket in lsh_buckets(headline_tokens(headline or ''))])
+
+def prune_near_duplicate_index(conn, window_days=NEAR_DUPLICATE_WINDOW_DAYS):
+    """Drop index entries that fell out of the comparison window; returns how many."""
+    cutoff = int(time.time()) - window_days * 86400
+    with conn:
+        return conn.execute("DELETE FROM headline_lsh WHERE created_ts < ?", (cutoff,)).rowcount
@@ -0,0 +1,73 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Worker processes for BeautifulSoup/feedparser work, overridable through settings['parse_workers'];
+# 0 parses on the calling thread. Parsing in a child keeps the GIL free for the browser and logging.
+DEFAULT_PARSE_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+PARSE_QUEUE_PER_WORKER = 2  # Jobs queued per worker before fetch threads block (backpressure)
+
+_pool = None
+_pool_workers = 0
+_slots = None
+_pool_lock = threading.Lock()
+
+def configure_parse_pool(workers=DEFAULT_PARSE_WORKERS):
+    """(Re)size the parse pool; the processes themselves start on the first job."""
+    global _pool, _pool_workers, _slots
+    workers = max(0, int(workers))
+    with _pool_lock:
+        if workers == _pool_workers:
+            return
+        old, _pool = _pool, None
+        _pool_workers = workers
+        _slots = threading.BoundedSemaphore(workers * PARSE_QUEUE_PER_WORKER) if workers else None
+    if old is not None:
+        old.shutdown(wait=False)
+    if workers:
+        logging.info(f"Parsing pages in {workers} worker processes")
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None and _pool_workers:
+            # spawn everywhere: forking a process that drives a browser from several threads is unsafe
+            _pool = ProcessPoolExecutor(max_workers=_pool_workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool, _slots
+
+def run_parser(func, *args):
+    """Run func(*args) in a parse worker and return its result; falls back to the calling thread.
+
+    `func` must be a module-level function and its arguments and result picklable,
+    so callers send the raw body and get back plain headline lists.
+    """
+    pool, slots = _get_pool()
+    if pool is None:
+        return func(*args)
+    with slots:
+        try:
+            return pool.submit(func, *args).result()
+        except BrokenProcessPool as e:
+            logging.error(f"Parse worker died ({e}), restarting the pool and parsing inline")
+            _reset_pool(pool)
+        except RuntimeError as e:  # Pool shut down while the job was being submitted
+            logging.warning(f"Parse pool unavailable ({e}), parsing inline")
+    return func(*args)
+
+def _reset_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+def shutdown_parse_pool():
+    """Stop the worker processes; the next job starts a fresh pool."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -1,17 +1,20 @@
 import time
 import random
 import logging
-import os
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-import sqlite3
 from datetime import datetime
 import pyperclip
 from modules.headline_fetcher import get_unused_headlines, mark_headline_posted
-import openai
-import google.generativeai as genai
+from modules.headline_ranking import update_headline_scores
+from modules.memories_db import get_connection, get_daily_count
+from modules.write_queue import enqueue_write, flush_writes
+from modules.content_search import find_prior_content
+from modules.llm_clients import get_api_client
+from modules.tweet_queue import (DEFAULT_PENDING_TWEETS, discard_stale_drafts, draft_taken, get_pending_tweets,
+                                 pop_pending_tweet, push_pending_tweet)
 import re  # Added for URL detection
 
 # Hardcoded constants
@@ -19,6 +22,7 @@ DELAY_MIN = 1
 DELAY_MAX = 5
 TWITTER_CHAR_LIMIT = 280  # Define as constant for clarity
 TWITTER_LINK_LENGTH = 23  # Twitter shortens all URLs to 23 characters
+FALLBACK_SELF_UPDATE = "Just vibing today! #LetsGetIt"  # Posted when the API cannot produce a tweet
 
 # Logging setup (unchanged)
 class ConciseFormatter(logging.Formatter):
@@ -43,63 +47,30 @@ class ConciseFormatter(logging.Formatter):
 logging.basicConfig(level=logging.INFO, handlers=[logging.StreamHandler()])
 logging.getLogger().handlers[0].setFormatter(ConciseFormatter())
 
-# Configuration
-DB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Database")
-DB_PATH = os.path.join(DB_DIR, "memories.db")
-
-# SQLite Database Setup (unchanged)
-def init_tweet_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS tweets 
-                 (id INTEGER PRIMARY KEY, headline TEXT, text TEXT, timestamp TEXT)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS self_updates 
-                 (id INTEGER PRIMARY KEY, text TEXT UNIQUE, timestamp TEXT)''')
-    conn.commit()
-    conn.close()
-
+# Tweets and self-updates (schema lives in modules/migrations.py)
 def save_tweet(headline, tweet):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("INSERT INTO tweets (headline, text, timestamp) VALUES (?, ?, ?)", 
-              (headline, tweet, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-    conn.commit()
-    conn.close()
+    now = datetime.now()
+    enqueue_write("INSERT INTO tweets (headline, text, timestamp, created_ts) VALUES (?, ?, ?, ?)", 
+                  (headline, tweet, now.strftime("%Y-%m-%d %H:%M:%S"), int(now.timestamp())))
 
 def save_self_update(tweet):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("INSERT OR IGNORE INTO self_updates (text, timestamp) VALUES (?, ?)", 
-              (tweet, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-    conn.commit()
-    conn.close()
+    now = datetime.now()
+    enqueue_write("INSERT OR IGNORE INTO self_updates (text, timestamp, created_ts) VALUES (?, ?, ?)", 
+                  (tweet, now.strftime("%Y-%m-%d %H:%M:%S"), int(now.timestamp())))
 
 def get_recent_tweets(limit=50):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT headline, text FROM tweets ORDER BY timestamp DESC LIMIT ?", (limit,))
-    recent = c.fetchall()
-    conn.close()
-    return recent
+    flush_writes()
+    c = get_connection().execute("SELECT headline, text FROM tweets ORDER BY created_ts DESC LIMIT ?", (limit,))
+    return c.fetchall()
 
 def get_used_self_updates(limit=50):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT text FROM self_updates ORDER BY timestamp DESC LIMIT ?", (limit,))
-    used = [row[0] for row in c.fetchall()]
-    conn.close()
-    return used
+    flush_writes()
+    c = get_connection().execute("SELECT text FROM self_updates ORDER BY created_ts DESC LIMIT ?", (limit,))
+    return [row[0] for row in c.fetchall()]
 
 def get_posts_count_today():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    today = datetime.now().strftime("%Y-%m-%d")
-    c.execute("SELECT COUNT(*) FROM tweets WHERE timestamp LIKE ?", (f"{today}%",))
-    count = c.fetchone()[0]
-    conn.close()
-    return count
-
-init_tweet_db()
+    flush_writes()
+    return get_daily_count('post')
 
 # Tweet Generation
 def strip_non_bmp(text):
@@ -139,12 +110,14 @@ def generate_self_update(api_client, used_self_updates, settings, attempt=1, max
     """Generate a fresh self-update tweet with selected API, retrying for uniqueness."""
     if attempt > max_attempts:
         logging.warning("Max attempts reached for unique self-update, returning fallback")
-        return "Just vibing today! #LetsGetIt"
+        return FALLBACK_SELF_UPDATE
     
     tone = ", ".join(settings['tone_keywords'])
     topic = random.choice(settings['self_update_topics'])
     language = settings.get('language', 'English')
-    prompt = f"You are {settings['personality_description']} with a {tone} tone. Generate a unique tweet under 280 characters about {topic} in {language}. Avoid these previous tweets: {', '.join(used_self_updates)}. Use 1-2 hashtags from {', '.join(settings['hashtags'])}, optionally a phrase from {', '.join(settings['custom_phrases'])}, and an emoji from {', '.join(settings['emoji_list'])} if {settings['use_emojis']} and random chance < {settings['emoji_frequency']}%."
+    # Earlier posts on this topic from the full history, not just the latest 50
+    avoid = list(dict.fromkeys(find_prior_content(topic, 'self_updates') + find_prior_content(topic, 'tweets') + list(used_self_updates)))
+    prompt = f"You are {settings['personality_description']} with a {tone} tone. Generate a unique tweet under 280 characters about {topic} in {language}. Avoid these previous tweets: {', '.join(avoid)}. Use 1-2 hashtags from {', '.join(settings['hashtags'])}, optionally a phrase from {', '.join(settings['custom_phrases'])}, and an emoji from {', '.join(settings['emoji_list'])} if {settings['use_emojis']} and random chance < {settings['emoji_frequency']}%."
     
     try:
         if settings['api_type'] == 'openai':
@@ -165,7 +138,7 @@ def generate_self_update(api_client, used_self_updates, settings, attempt=1, max
         # Truncate if necessary to ensure it fits within Twitter's limit
         tweet = truncate_to_twitter_limit(tweet)
         
-        if tweet in used_self_updates:
+        if tweet in avoid:
             logging.info(f"Generated duplicate self-update on attempt {attempt}: {tweet}, retrying...")
             return generate_self_update(api_client, used_self_updates, settings, attempt + 1, max_attempts)
         return tweet
@@ -173,43 +146,39 @@ def generate_self_update(api_client, used_self_updates, settings, attempt=1, max
         logging.error(f"{settings['api_type'].capitalize()} generation failed on attempt {attempt}: {e}")
         if attempt < max_attempts:
             return generate_self_update(api_client, used_self_updates, settings, attempt + 1, max_attempts)
-        return "Just vibing today! #LetsGetIt"
+        return FALLBACK_SELF_UPDATE
 
-def generate_tweet(settings):
+def draft_tweet(settings, reserved=()):
+    """Generate a tweet without recording it; returns (headline_used, tweet).
+
+    `reserved` holds the (headline, tweet) drafts already queued: their headlines are
+    left to them and their texts count as used.
+    """
     try:
-        if settings['api_type'] == 'openai':
-            api_client = openai.OpenAI(api_key=settings['api_key'])
-        else:  # gemini
-            genai.configure(api_key=settings['api_key'])
-            api_client = genai.GenerativeModel('gemini-1.5-flash')
+        api_client = get_api_client(settings)
 
-        headlines = get_unused_headlines() if settings.get('research_enabled', True) else []
-        used_self_updates = get_used_self_updates()
+        reserved_headlines = {headline for headline, _ in reserved}
+        reserved_texts = [tweet for _, tweet in reserved]
+        headlines = []
+        if settings.get('research_enabled', True):
+            update_headline_scores(settings)  # Picks up a changed personality before selecting
+            headlines = [h for h in get_unused_headlines(limit=len(reserved_headlines) + 1) if h not in reserved_headlines]
+        used_self_updates = get_used_self_updates() + reserved_texts
         recent_tweets = get_recent_tweets()
-        used_texts = {text for _, text in recent_tweets}
+        used_texts = {text for _, text in recent_tweets} | set(reserved_texts)
 
         tweet_type_chance = settings['tweet_type_ratio'] / 100
         tone = ", ".join(settings['tone_keywords'])
         language = settings.get('language', 'English')
 
         if headlines and random.random() < tweet_type_chance and settings.get('research_enabled', True):
-            numbered_headlines = "\n".join(f"{i}: {h}" for i, h in enumerate(headlines))
-            prompt = f"You’re {settings['personality_description']}. Pick the most interesting headline from this numbered list based on your personality. Return only the number.\nHeadlines:\n{numbered_headlines}"
-            if settings['api_type'] == 'openai':
-                response = api_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "system", "content": prompt}],
-                    max_tokens=10,
-                    temperature=0.7
-                )
-                chosen_index = int(response.choices[0].message.content.strip())
-            else:  # gemini
-                response = api_client.generate_content(prompt)
-                chosen_index = int(response.text.strip())
-            headline = headlines[chosen_index]
-            logging.info(f"{settings['api_type'].capitalize()} picked headline {chosen_index}: {headline}")
+            # Ranked locally against the personality profile, no API round-trip
+            headline = headlines[0]
+            logging.info(f"Picked top-ranked headline: {headline}")
+            earlier_takes = find_prior_content(headline, 'tweets', limit=5)
+            avoid_clause = f" Don't repeat these earlier tweets on the topic: {', '.join(earlier_takes)}." if earlier_takes else ""
 
-            prompt = f"You are {settings['personality_description']} with a {tone} tone. Generate a tweet under 280 characters about the headline: '{headline}' in {language}. Use 1-2 hashtags from {', '.join(settings['hashtags'])}. Optionally use a phrase from {', '.join(settings['custom_phrases'])}, and add an emoji from {', '.join(settings['emoji_list'])} if {settings['use_emojis']} and random chance < {settings['emoji_frequency']}%."
+            prompt = f"You are {settings['personality_description']} with a {tone} tone. Generate a tweet under 280 characters about the headline: '{headline}' in {language}.{avoid_clause} Use 1-2 hashtags from {', '.join(settings['hashtags'])}. Optionally use a phrase from {', '.join(settings['custom_phrases'])}, and add an emoji from {', '.join(settings['emoji_list'])} if {settings['use_emojis']} and random chance < {settings['emoji_frequency']}%."
             if settings['api_type'] == 'openai':
                 response = api_client.chat.completions.create(
                     model="gpt-3.5-turbo",
@@ -225,7 +194,6 @@ def generate_tweet(settings):
         else:
             tweet = generate_self_update(api_client, used_self_updates, settings)
             headline_used = "Self-Update"
-            save_self_update(tweet)
 
         # Remove asterisks from the generated tweet
         tweet = tweet.replace('*', '').strip('"')
@@ -237,27 +205,53 @@ def generate_tweet(settings):
             logging.warning(f"Duplicate tweet detected: {tweet}, generating new self-update")
             tweet = generate_self_update(api_client, used_self_updates, settings)
             headline_used = "Self-Update (Duplicate Avoided)"
-            save_self_update(tweet)
             tweet = truncate_to_twitter_limit(tweet)
-        
-        save_tweet(headline_used, tweet)
-        if "Self-Update" not in headline_used:
-            mark_headline_posted(headline_used)
-        return tweet
+        return headline_used, tweet
 
     except Exception as e:
         logging.error(f"Tweet generation failed: {e}, falling back to self-update")
-        if settings['api_type'] == 'openai':
-            api_client = openai.OpenAI(api_key=settings['api_key'])
-        else:
-            genai.configure(api_key=settings['api_key'])
-            api_client = genai.GenerativeModel('gemini-1.5-flash')
+        api_client = get_api_client(settings)
         used_self_updates = get_used_self_updates()
         tweet = generate_self_update(api_client, used_self_updates, settings)
         tweet = truncate_to_twitter_limit(tweet)
-        save_tweet("Self-Update (Fallback)", tweet)
+        return "Self-Update (Fallback)", tweet
+
+def record_tweet(headline_used, tweet):
+    """Store a tweet that is about to be posted, with its self-update or used headline."""
+    save_tweet(headline_used, tweet)
+    if "Self-Update" in headline_used:
         save_self_update(tweet)
-        return tweet
+    else:
+        mark_headline_posted(headline_used)
+
+def fill_tweet_queue(settings):
+    """Draft tweets until settings['pending_tweets'] are queued; returns how many were added."""
+    discarded = discard_stale_drafts(settings)
+    if discarded:
+        logging.info(f"Discarded {discarded} stale tweet drafts")
+    target = settings.get('pending_tweets', DEFAULT_PENDING_TWEETS)
+    added = 0
+    pending = get_pending_tweets(settings)
+    while len(pending) < target:
+        headline_used, tweet = draft_tweet(settings, pending)
+        if headline_used == "Self-Update (Fallback)" or tweet == FALLBACK_SELF_UPDATE:
+            logging.warning("Tweet drafting failed, leaving the queue for the next pass")
+            break
+        push_pending_tweet(settings, headline_used, tweet)
+        pending.append((headline_used, tweet))
+        added += 1
+    return added
+
+def generate_tweet(settings):
+    """Next tweet to post: a queued draft when one is ready, otherwise one generated now."""
+    draft = pop_pending_tweet(settings)
+    if draft:
+        logging.info("Using a pre-generated tweet draft")
+    else:
+        draft = draft_tweet(settings, get_pending_tweets(settings))
+    record_tweet(*draft)
+    draft_taken.set()  # Refill only now, so the headline just used is already marked as posted
+    return draft[1]
 
 def post_to_x(driver, tweet):
     for attempt in range(3):
@@ -320,16 +314,11 @@ def post_tweet(driver, settings):
         logging.info(f"Posted successfully. Today's post count: {get_posts_count_today()}/{settings['daily_post_limit'] or 'infinite'}")
     except Exception as e:
         logging.error(f"Post tweet failed: {e}, falling back to self-update")
-        if settings['api_type'] == 'openai':
-            api_client = openai.OpenAI(api_key=settings['api_key'])
-        else:
-            genai.configure(api_key=settings['api_key'])
-            api_client = genai.GenerativeModel('gemini-1.5-flash')
+        api_client = get_api_client(settings)
         used_self_updates = get_used_self_updates()
         tweet = generate_self_update(api_client, used_self_updates, settings)
         tweet = truncate_to_twitter_limit(tweet)
-        save_tweet("Self-Update (Posting Failure Fallback)", tweet)
-        save_self_update(tweet)
+        record_tweet("Self-Update (Posting Failure Fallback)", tweet)
         logging.info(f"Fallback tweet generated: {tweet}")
         post_to_x(driver, tweet)
 
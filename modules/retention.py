@@ -0,0 +1,119 @@
+import logging
+import time
+from modules.memories_db import ARCHIVE_DB_PATH, get_connection
+from modules.migrations import FTS_SOURCES, FTS_TOKENIZE, fts5_available
+
+# Defaults, overridable through settings['retention_days'] (0 disables archiving)
+DEFAULT_RETENTION_DAYS = 90
+ARCHIVE_BATCH_SIZE = 5000  # Rows moved per transaction, keeps the writer lock short
+INCREMENTAL_VACUUM_PAGES = 2000  # Free pages returned to the OS per idle pass
+
+# Table -> column whose values must stay known for dedupe after the row is archived (stored as TEXT)
+RETENTION_TABLES = {
+    'headlines': 'headline_hash',
+    'likes': 'post_id',
+    'comments': 'post_id',
+    'followed': 'username',
+    'tweets': None,
+    'self_updates': None,
+}
+
+def _columns(conn, schema, table):
+    return [col[1] for col in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+def _prepare_archive_fts(conn, table):
+    """Create archive.<table>_fts over the archived rows of an FTS_SOURCES table; False without FTS5.
+
+    The delete trigger of main.<table>_fts drops archived rows from the main index, so
+    modules/content_search.py searches this one too.
+    """
+    column = FTS_SOURCES.get(table)
+    if column is None or not fts5_available(conn):
+        return False
+    if not conn.execute("SELECT 1 FROM archive.sqlite_master WHERE name = ?", (f"{table}_fts",)).fetchone():
+        conn.execute(f"CREATE VIRTUAL TABLE archive.{table}_fts USING fts5("
+                     f"{column}, content='{table}', content_rowid='id', tokenize='{FTS_TOKENIZE}')")
+        conn.execute(f"INSERT INTO archive.{table}_fts ({table}_fts) VALUES ('rebuild')")  # Rows archived before the index existed
+    return True
+
+def _prepare_archive_table(conn, table):
+    """Create or widen archive.<table> so it has every column of main.<table>."""
+    main_columns = _columns(conn, 'main', table)
+    archive_columns = _columns(conn, 'archive', table)
+    if not archive_columns:
+        conn.execute(f"CREATE TABLE archive.{table} AS SELECT * FROM main.{table} WHERE 0")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS archive.idx_{table}_id ON {table}(id)")
+    else:
+        for column in main_columns:
+            if column not in archive_columns:
+                conn.execute(f"ALTER TABLE archive.{table} ADD COLUMN {column}")
+    return main_columns
+
+def archive_old_rows(retention_days=DEFAULT_RETENTION_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move rows older than `retention_days` into memories_archive.db; returns {table: rows_moved}.
+
+    Dedupe keys of moved rows are kept in the compact seen_keys table, so liked/commented posts,
+    followed accounts and known headlines are still recognised after archiving.
+    """
+    if retention_days <= 0:
+        return {}
+    cutoff = int(time.time()) - retention_days * 86400
+    conn = get_connection()
+    conn.execute("ATTACH DATABASE ? AS archive", (ARCHIVE_DB_PATH,))
+    moved = {}
+    try:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS retention_batch (id INTEGER PRIMARY KEY)")
+        for table, key_column in RETENTION_TABLES.items():
+            with conn:
+                column_list = ", ".join(_prepare_archive_table(conn, table))
+                archive_fts = _prepare_archive_fts(conn, table)
+            moved[table] = 0
+            while True:
+                with conn:
+                    conn.execute("DELETE FROM temp.retention_batch")
+                    conn.execute(f"INSERT INTO temp.retention_batch (id) SELECT id FROM main.{table} "
+                                 f"WHERE created_ts < ? ORDER BY created_ts LIMIT ?", (cutoff, batch_size))
+                    batch = conn.execute("SELECT COUNT(*) FROM temp.retention_batch").fetchone()[0]
+                    if batch:
+                        batch_filter = "WHERE id IN (SELECT id FROM temp.retention_batch)"
+                        conn.execute(f"INSERT INTO archive.{table} ({column_list}) "
+                                     f"SELECT {column_list} FROM main.{table} {batch_filter}")
+                        if archive_fts:
+                            text_column = FTS_SOURCES[table]
+                            conn.execute(f"INSERT INTO archive.{table}_fts (rowid, {text_column}) "
+                                         f"SELECT id, {text_column} FROM main.{table} {batch_filter}")
+                        if key_column:
+                            conn.execute(f"INSERT OR IGNORE INTO main.seen_keys (kind, key) "
+                                         f"SELECT '{table}', {key_column} FROM main.{table} "
+                                         f"{batch_filter} AND {key_column} IS NOT NULL")
+                        conn.execute(f"DELETE FROM main.{table} {batch_filter}")
+                if not batch:
+                    break
+                moved[table] += batch
+            if moved[table]:
+                logging.info(f"Archived {moved[table]} {table} rows older than {retention_days} days")
+    finally:
+        conn.execute("DETACH DATABASE archive")
+    return moved
+
+def compact_database():
+    """Return freed pages to the OS and refresh planner statistics without a full VACUUM."""
+    conn = get_connection()
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        # auto_vacuum mode only takes effect after one full VACUUM; paid once per database
+        logging.info("Enabling incremental auto-vacuum on memories.db (one-time full VACUUM)")
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+    conn.execute(f"PRAGMA incremental_vacuum({INCREMENTAL_VACUUM_PAGES})")
+    conn.execute("PRAGMA optimize")  # Runs ANALYZE only on tables whose statistics are stale
+    conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+def run_maintenance(settings):
+    """Idle-time housekeeping between bot runs: archive old rows, then compact."""
+    try:
+        moved = archive_old_rows(settings.get('retention_days', DEFAULT_RETENTION_DAYS))
+        compact_database()
+        if any(moved.values()):
+            logging.info(f"Database maintenance archived {sum(moved.values())} rows to {ARCHIVE_DB_PATH}")
+    except Exception as e:
+        logging.error(f"Database maintenance failed: {e}")
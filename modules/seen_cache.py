@@ -0,0 +1,84 @@
+import hashlib
+import logging
+import math
+import threading
+from modules.memories_db import get_connection
+
+# Histories larger than this are held in a Bloom filter instead of a set
+BLOOM_THRESHOLD = 200000
+BLOOM_ERROR_RATE = 0.001
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys (double hashing on a single blake2b digest)."""
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+class SeenIds:
+    """Per-run membership cache over the key column of an action table.
+
+    The column, plus the keys of archived rows kept in seen_keys, is loaded from
+    memories.db on first use and kept current through add(),
+    so dedupe checks inside the scroll loops are memory lookups. Small histories live in
+    a set; past BLOOM_THRESHOLD rows a Bloom filter is used instead and its (rare)
+    positive hits are confirmed against the indexed column, so answers stay exact. Keys
+    added since the load are also kept exactly, as their rows may still sit in the
+    write-behind queue (modules/write_queue.py) when the confirming query runs.
+    """
+
+    def __init__(self, table, column):
+        self.table = table
+        self.column = column
+        self._keys = None
+        self._added = set()
+        self._lock = threading.Lock()
+
+    def load(self):
+        conn = get_connection()
+        count = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        count += conn.execute("SELECT COUNT(*) FROM seen_keys WHERE kind = ?", (self.table,)).fetchone()[0]
+        keys = BloomFilter(count * 2) if count >= BLOOM_THRESHOLD else set()
+        for (key,) in conn.execute(f"SELECT {self.column} FROM {self.table} WHERE {self.column} IS NOT NULL "
+                                   f"UNION ALL SELECT key FROM seen_keys WHERE kind = ?", (self.table,)):
+            keys.add(key)
+        with self._lock:
+            self._keys = keys
+        logging.info(f"Loaded {count} {self.table}.{self.column} keys into {'Bloom filter' if isinstance(keys, BloomFilter) else 'memory'}")
+
+    def add(self, key):
+        if self._keys is None:
+            self.load()
+        with self._lock:
+            self._keys.add(key)
+            if isinstance(self._keys, BloomFilter):
+                self._added.add(key)
+
+    def __contains__(self, key):
+        if self._keys is None:
+            self.load()
+        keys = self._keys
+        if key not in keys:
+            return False
+        if isinstance(keys, set) or key in self._added:
+            return True
+        conn = get_connection()
+        row = conn.execute(f"SELECT 1 FROM {self.table} WHERE {self.column} = ? LIMIT 1", (key,)).fetchone()
+        if row is None:
+            row = conn.execute("SELECT 1 FROM seen_keys WHERE kind = ? AND key = ?", (self.table, key)).fetchone()
+        return row is not None
@@ -0,0 +1,31 @@
+import hashlib
+import time
+from modules.memories_db import get_connection
+
+def body_hash(content):
+    """Digest of a downloaded body, to spot unchanged pages from servers that ignore validators."""
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+def load_source_cache(urls):
+    """Cached validators for `urls`: {url: {'etag', 'last_modified', 'body_hash'}}; unknown URLs are absent."""
+    cache = {}
+    conn = get_connection()
+    for url in urls:
+        row = conn.execute("SELECT etag, last_modified, body_hash FROM source_cache WHERE url = ?", (url,)).fetchone()
+        if row:
+            cache[url] = {'etag': row[0], 'last_modified': row[1], 'body_hash': row[2]}
+    return cache
+
+def conditional_headers(cached):
+    """If-None-Match / If-Modified-Since for a cached source entry (or None)."""
+    headers = {}
+    if cached and cached['etag']:
+        headers['If-None-Match'] = cached['etag']
+    if cached and cached['last_modified']:
+        headers['If-Modified-Since'] = cached['last_modified']
+    return headers
+
+def save_source_cache(url, etag, last_modified, content_hash):
+    with get_connection() as conn:
+        conn.execute("INSERT OR REPLACE INTO source_cache (url, etag, last_modified, body_hash, checked_ts) VALUES (?, ?, ?, ?, ?)",
+                     (url, etag, last_modified, content_hash, int(time.time())))
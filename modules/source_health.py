@@ -0,0 +1,99 @@
+import logging
+import time
+from modules.memories_db import get_connection
+
+# Circuit breaker: opens after this many failed polls in a row, then lets a single trial
+# poll through (half-open) once the cooldown has passed; each failed trial doubles it
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_COOLDOWN = 3600
+BREAKER_MAX_COOLDOWN = 7 * 86400
+LATENCY_SMOOTHING = 0.3  # Weight of the newest sample in avg_latency_ms
+
+# Poll outcomes that count against a source
+FAILURE_OUTCOMES = ('network_error', 'http_error', 'parse_error', 'empty')
+
+def check_breakers(urls, now=None):
+    """Split `urls` into (allowed, half_open, blocked) according to their circuit breakers.
+
+    Half-open sources are also in `allowed`; they get one download attempt without retries.
+    """
+    now = int(now or time.time())
+    conn = get_connection()
+    allowed, half_open, blocked = [], set(), []
+    for url in urls:
+        row = conn.execute("SELECT breaker_state, open_until_ts FROM source_health WHERE url = ?", (url,)).fetchone()
+        if row is None or row[0] == 'closed':
+            allowed.append(url)
+        elif row[1] <= now:
+            allowed.append(url)
+            half_open.add(url)
+        else:
+            blocked.append(url)
+    return allowed, half_open, blocked
+
+def record_fetch(url, outcome, status=None, latency_ms=None, new_count=0, now=None):
+    """Update the metrics and breaker of `url` after a poll; returns the breaker state."""
+    now = int(now or time.time())
+    conn = get_connection()
+    row = conn.execute("SELECT avg_latency_ms, consecutive_failures, breaker_state, cooldown_s FROM source_health WHERE url = ?",
+                       (url,)).fetchone()
+    avg_latency, failures, state, cooldown = row if row else (None, 0, 'closed', BREAKER_COOLDOWN)
+    if latency_ms is not None:
+        avg_latency = latency_ms if avg_latency is None else (1 - LATENCY_SMOOTHING) * avg_latency + LATENCY_SMOOTHING * latency_ms
+    failed = outcome in FAILURE_OUTCOMES
+    open_until = None
+    if not failed:
+        failures, state, cooldown = 0, 'closed', BREAKER_COOLDOWN
+    else:
+        failures += 1
+        if state != 'closed':
+            cooldown = min(cooldown * 2, BREAKER_MAX_COOLDOWN)  # Trial poll failed, stay open longer
+        if state != 'closed' or failures >= BREAKER_FAILURE_THRESHOLD:
+            state, open_until = 'open', now + cooldown
+            logging.warning(f"Circuit open for {url} after {failures} failed polls, next trial in {cooldown // 60} minutes")
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO source_health (url) VALUES (?)", (url,))
+        conn.execute('''UPDATE source_health SET polls = polls + 1, failures_total = failures_total + ?,
+                            headlines_total = headlines_total + ?, last_yield = ?, last_status = ?,
+                            last_outcome = ?, last_latency_ms = ?, avg_latency_ms = ?,
+                            consecutive_failures = ?, breaker_state = ?, open_until_ts = ?,
+                            cooldown_s = ?, last_polled_ts = ?
+                        WHERE url = ?''',
+                     (int(failed), new_count, new_count, status, outcome, latency_ms, avg_latency,
+                      failures, state, open_until, cooldown, now, url))
+    return state
+
+def get_health_report(limit=10):
+    """Slowest, least productive and circuit-broken sources, as lists of row dicts."""
+    conn = get_connection()
+    columns = "url, polls, headlines_total, avg_latency_ms, last_status, last_outcome, consecutive_failures, breaker_state, open_until_ts"
+    def rows(sql):
+        c = conn.execute(sql, (limit,))
+        names = [col[0] for col in c.description]
+        return [dict(zip(names, row)) for row in c.fetchall()]
+    return {
+        'slowest': rows(f"SELECT {columns} FROM source_health WHERE avg_latency_ms IS NOT NULL ORDER BY avg_latency_ms DESC LIMIT ?"),
+        'least_productive': rows(f"SELECT {columns} FROM source_health WHERE polls > 0 "
+                                 f"ORDER BY CAST(headlines_total AS REAL) / polls, polls DESC LIMIT ?"),
+        'open': rows(f"SELECT {columns} FROM source_health WHERE breaker_state != 'closed' ORDER BY open_until_ts LIMIT ?"),
+    }
+
+def print_health_report(limit=10):
+    report = get_health_report(limit)
+    titles = {'slowest': "Slowest sources", 'least_productive': "Least productive sources", 'open': "Open circuit breakers"}
+    for key, title in titles.items():
+        print(f"\n{title}:")
+        if not report[key]:
+            print("  (none)")
+        for row in report[key]:
+            per_poll = row['headlines_total'] / row['polls'] if row['polls'] else 0
+            latency = f"{row['avg_latency_ms']:.0f} ms" if row['avg_latency_ms'] is not None else "-"
+            print(f"  {row['url']}\n    {latency} avg, {per_poll:.1f} headlines/poll over {row['polls']} polls, "
+                  f"last {row['last_outcome']} ({row['last_status'] or '-'}), {row['consecutive_failures']} failures in a row, "
+                  f"breaker {row['breaker_state']}")
+
+if __name__ == "__main__":
+    import sys
+    from modules.migrations import run_migrations
+    run_migrations()
+    print_health_report(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,43 @@
+import time
+from modules.memories_db import get_connection
+
+# Poll interval bounds in seconds; a source is polled at most once per bot loop anyway
+MIN_POLL_INTERVAL = 10 * 60
+MAX_POLL_INTERVAL = 24 * 3600
+MAX_FAILURE_BACKOFF = 6  # Failing sources back off to MIN_POLL_INTERVAL * 2**6 at most
+
+def get_due_sources(urls, now=None):
+    """Split `urls` into (due, waiting); sources never polled before are always due."""
+    now = int(now or time.time())
+    conn = get_connection()
+    due, waiting = [], []
+    for url in urls:
+        row = conn.execute("SELECT next_poll_ts FROM source_schedule WHERE url = ?", (url,)).fetchone()
+        (due if row is None or row[0] <= now else waiting).append(url)
+    return due, waiting
+
+def record_poll(url, new_count, failed=False, now=None):
+    """Schedule the next poll of `url` from what this poll yielded.
+
+    Productive sources are polled about twice per observed gap between new headlines;
+    quiet ones double their interval each time, and failing ones back off exponentially.
+    """
+    now = int(now or time.time())
+    conn = get_connection()
+    row = conn.execute("SELECT last_new_ts, interval_s, failures FROM source_schedule WHERE url = ?", (url,)).fetchone()
+    last_new_ts, interval, failures = row if row else (None, MIN_POLL_INTERVAL, 0)
+    if failed:
+        failures += 1
+        interval = MIN_POLL_INTERVAL * 2 ** min(failures, MAX_FAILURE_BACKOFF)
+    elif new_count:
+        failures = 0
+        interval = (now - last_new_ts) // 2 if last_new_ts else MIN_POLL_INTERVAL
+        last_new_ts = now
+    else:
+        failures = 0
+        interval *= 2
+    interval = max(MIN_POLL_INTERVAL, min(MAX_POLL_INTERVAL, interval))
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO source_schedule (url, last_polled_ts, last_new_ts, interval_s, next_poll_ts, failures) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", (url, now, last_new_ts, interval, now + interval, failures))
+    return interval
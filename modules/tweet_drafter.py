@@ -0,0 +1,26 @@
+import logging
+from modules.background_worker import BackgroundWorker
+from modules.posting import fill_tweet_queue
+from modules.tweet_queue import draft_taken
+
+# Minutes between checks of the draft queue; taking a draft wakes the worker immediately
+DRAFT_CHECK_INTERVAL = 10
+
+def _draft_ahead(settings):
+    added = fill_tweet_queue(settings)
+    if added:
+        logging.info(f"Drafted {added} tweets ahead of posting")
+
+_drafter = BackgroundWorker("tweet-drafter", "Tweet drafting", _draft_ahead,
+                            lambda settings: DRAFT_CHECK_INTERVAL, wake=draft_taken)
+
+def start_drafter(settings):
+    """Keep settings['pending_tweets'] drafts ready in the background so posting never waits on the API.
+
+    Calling it again swaps in new settings (drafts made with the old ones are discarded) and refills now.
+    """
+    _drafter.start(settings)
+
+def stop_drafter(timeout=30):
+    """Stop the worker after its current draft, e.g. when posting is disabled or on shutdown."""
+    _drafter.stop(timeout)
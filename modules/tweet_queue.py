@@ -0,0 +1,54 @@
+import hashlib
+import json
+import threading
+import time
+from modules.memories_db import get_connection
+from modules.write_queue import flush_writes
+
+DEFAULT_PENDING_TWEETS = 3  # Drafts kept ready, overridable through settings['pending_tweets']
+DRAFT_MAX_AGE = 12 * 3600  # Older drafts are dropped, their headline is no longer news
+
+# Settings that shape a draft; changing any of them makes queued drafts stale
+DRAFT_SETTINGS = ('api_type', 'personality_description', 'tone_keywords', 'language', 'hashtags', 'custom_phrases',
+                  'emoji_list', 'use_emojis', 'emoji_frequency', 'tweet_type_ratio', 'self_update_topics', 'research_enabled')
+
+draft_taken = threading.Event()  # Set once a popped draft is recorded, so the drafter refills right away
+
+def draft_settings_hash(settings):
+    values = json.dumps({key: settings.get(key) for key in DRAFT_SETTINGS}, sort_keys=True, default=str)
+    return hashlib.blake2b(values.encode('utf-8'), digest_size=8).hexdigest()
+
+def discard_stale_drafts(settings, now=None):
+    """Drop drafts made with other settings, older than DRAFT_MAX_AGE or already posted
+    (same text, or same headline drafted twice while the queue was being filled); returns how many.
+    """
+    cutoff = int(now or time.time()) - DRAFT_MAX_AGE
+    flush_writes()
+    with get_connection() as conn:
+        return conn.execute('''DELETE FROM pending_tweets WHERE settings_hash != ? OR created_ts < ?
+                                   OR tweet IN (SELECT text FROM tweets)
+                                   OR (headline NOT LIKE 'Self-Update%' AND headline IN (SELECT headline FROM tweets))''',
+                            (draft_settings_hash(settings), cutoff)).rowcount
+
+def get_pending_tweets(settings):
+    """(headline, tweet) of the queued drafts that are valid for `settings`, oldest first."""
+    c = get_connection().execute("SELECT headline, tweet FROM pending_tweets WHERE settings_hash = ? ORDER BY id",
+                                 (draft_settings_hash(settings),))
+    return c.fetchall()
+
+def push_pending_tweet(settings, headline, tweet):
+    with get_connection() as conn:
+        conn.execute("INSERT INTO pending_tweets (headline, tweet, settings_hash, created_ts) VALUES (?, ?, ?, ?)",
+                     (headline, tweet, draft_settings_hash(settings), int(time.time())))
+
+def pop_pending_tweet(settings):
+    """Take the oldest fresh draft for `settings` off the queue; returns (headline, tweet) or None."""
+    discard_stale_drafts(settings)
+    conn = get_connection()
+    with conn:
+        row = conn.execute("SELECT id, headline, tweet FROM pending_tweets WHERE settings_hash = ? ORDER BY id LIMIT 1",
+                           (draft_settings_hash(settings),)).fetchone()
+        if row is None:
+            return None
+        conn.execute("DELETE FROM pending_tweets WHERE id = ?", (row[0],))
+    return row[1], row[2]
@@ -0,0 +1,135 @@
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from modules.memories_db import get_connection
+
+# Write-behind settings
+QUEUE_MAX_SIZE = 1000  # Producers block (backpressure) once this many writes are pending
+BATCH_MAX_SIZE = 200  # Writes committed per transaction
+FLUSH_INTERVAL = 0.5  # Seconds the writer waits to gather a batch
+FLUSH_TIMEOUT = 30  # Seconds flush_writes() waits before callers read the database as it is
+RETRY_BACKOFF = 0.5  # Seconds before retrying a batch that found the database locked, doubled per attempt
+RETRY_BACKOFF_MAX = 30
+
+_STOP = object()
+
+_queue = queue.Queue(maxsize=QUEUE_MAX_SIZE)
+_worker = None
+_worker_lock = threading.Lock()
+_pending = 0  # Writes submitted but not yet committed
+_pending_lock = threading.Lock()
+
+def _is_busy(error):
+    """True for "database is locked/busy": the batch can succeed later, unlike a failing statement."""
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xff in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in str(error) or 'busy' in str(error))
+
+def _commit_batch(conn, batch):
+    """Run every write of the batch in one transaction; returns False if the database was locked.
+
+    A statement failing on its own (constraint, bad SQL) is logged and skipped. A locked or busy
+    database rolls the whole batch back instead, so the writer can retry it without losing a write.
+    """
+    try:
+        with conn:
+            for sql, params in batch:
+                try:
+                    conn.execute(sql, params)
+                except sqlite3.Error as e:
+                    if _is_busy(e):
+                        raise
+                    logging.error(f"Write-behind statement failed ({e}): {sql}")
+    except sqlite3.Error as e:
+        if _is_busy(e):
+            return False
+        logging.error(f"Write-behind batch of {len(batch)} writes failed: {e}")
+    return True
+
+def _commit_with_retry(conn, batch):
+    """Commit the batch, backing off while another connection holds the write lock."""
+    global _pending
+    delay = RETRY_BACKOFF
+    while not _commit_batch(conn, batch):
+        logging.warning(f"Database locked, retrying {len(batch)} queued writes in {delay:.1f}s")
+        time.sleep(delay)
+        delay = min(delay * 2, RETRY_BACKOFF_MAX)
+    with _pending_lock:
+        _pending -= len(batch)
+
+def _run_writer():
+    conn = get_connection()
+    stopping = False
+    while not stopping:
+        item = _queue.get()
+        batch, barriers = [], []
+        while True:
+            if item is _STOP:
+                stopping = True
+            elif isinstance(item, threading.Event):
+                barriers.append(item)
+            else:
+                batch.append(item)
+            if stopping or len(batch) >= BATCH_MAX_SIZE:
+                break
+            try:
+                # Once a flush barrier is waiting, commit what is already queued instead of lingering
+                item = _queue.get(block=not barriers, timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                break
+        if batch:
+            _commit_with_retry(conn, batch)
+        for barrier in barriers:
+            barrier.set()
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run_writer, name="db-writer", daemon=True)
+            _worker.start()
+
+def enqueue_write(sql, params=()):
+    """Queue an INSERT/UPDATE for the background writer; returns without touching the disk."""
+    global _pending
+    _ensure_worker()
+    with _pending_lock:
+        _pending += 1
+    _queue.put((sql, params))
+
+def flush_writes(timeout=FLUSH_TIMEOUT):
+    """Barrier: block until every write queued so far is committed. Free when nothing is pending.
+
+    Returns False, and the caller reads the database as it is, when the writer is not running
+    or does not get there within `timeout` (e.g. while it waits out a locked database).
+    """
+    if _pending == 0:
+        return True
+    worker = _worker
+    if worker is None or not worker.is_alive():
+        logging.error(f"Database writer is not running, reading without {_pending} queued writes")
+        return False
+    barrier = threading.Event()
+    _queue.put(barrier)
+    if not barrier.wait(timeout):
+        logging.warning(f"Database writer did not flush within {timeout}s, reading without {_pending} queued writes")
+        return False
+    return True
+
+def stop_writer(timeout=10):
+    """Drain the queue and stop the writer thread, e.g. on shutdown."""
+    global _worker
+    with _worker_lock:
+        worker, _worker = _worker, None
+    if worker is None or not worker.is_alive():
+        return
+    _queue.put(_STOP)
+    worker.join(timeout)
+    if worker.is_alive():
+        logging.warning(f"Database writer did not drain within {timeout}s, {_pending} writes pending")
+
+atexit.register(stop_writer)
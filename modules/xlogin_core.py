@@ -11,7 +11,8 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from .xlogin_setup_gui import select_setup_gui, shutdown_flag
 from .xlogin_settings_gui import get_settings_from_gui
-from .xlogin_db import init_setup_db, load_credentials
+from .xlogin_db import load_credentials
+from .migrations import run_migrations
 from tkinter import messagebox
 
 # Hardcoded constants
@@ -109,7 +110,7 @@ def login_to_x(driver, username, password, email, max_attempts=3):
                 raise Exception("Login failed after maximum attempts")
 
 def get_logged_in_driver():
-    init_setup_db()
+    run_migrations()  # No-op once main() has migrated the database
     while True:
         setup_choice = select_setup_gui()
         if setup_choice is None:
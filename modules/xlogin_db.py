@@ -1,46 +1,33 @@
-import sqlite3
-import os
 import logging
-import ast
+import json
+import copy
 from datetime import datetime
+from .memories_db import get_connection
 
-DB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Database")
-DB_PATH = os.path.join(DB_DIR, "memories.db")
+# Presets are stored as JSON; these keys are coerced to their expected types on load and save
+PERSONALITY_INT_FIELDS = ('tweet_type_ratio', 'daily_post_limit', 'daily_follow_limit', 'daily_like_limit',
+                          'daily_comment_limit', 'loop_count', 'schedule_interval', 'emoji_frequency')
+PERSONALITY_BOOL_FIELDS = ('post_enabled', 'follow_enabled', 'like_enabled', 'comment_enabled', 'use_emojis',
+                           'research_enabled', 'headless_enabled', 'autodetect_language')
 
-def init_setup_db():
-    if not os.path.exists(DB_DIR):
-        os.makedirs(DB_DIR)
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        c.execute('''CREATE TABLE IF NOT EXISTS credentials (
-            username TEXT PRIMARY KEY,
-            password TEXT NOT NULL,
-            email TEXT NOT NULL,
-            api_type TEXT,  -- Can be NULL now, as we rely on api_keys table
-            api_key TEXT,   -- Can be NULL now
-            last_updated TEXT NOT NULL
-        )''')
-        c.execute('''CREATE TABLE IF NOT EXISTS personalities (
-            preset_name TEXT PRIMARY KEY,
-            settings TEXT NOT NULL,
-            last_updated TEXT NOT NULL
-        )''')
-        # New table for API keys
-        c.execute('''CREATE TABLE IF NOT EXISTS api_keys (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL,
-            custom_name TEXT NOT NULL,
-            api_type TEXT NOT NULL,
-            api_key TEXT NOT NULL,
-            last_updated TEXT NOT NULL,
-            UNIQUE(username, custom_name),
-            FOREIGN KEY(username) REFERENCES credentials(username)
-        )''')
-        conn.commit()
+# preset_name -> (last_updated, settings); an entry is only trusted while last_updated matches the row
+_personality_cache = {}
+
+def _normalize_personality(settings):
+    settings.pop('engagement_style', None)
+    settings.setdefault('language', 'English')
+    settings.setdefault('autodetect_language', False)
+    for key in PERSONALITY_INT_FIELDS:
+        if key in settings:
+            settings[key] = int(settings[key])
+    for key in PERSONALITY_BOOL_FIELDS:
+        if key in settings:
+            settings[key] = bool(settings[key])
+    return settings
 
 def save_api_key(username, custom_name, api_type, api_key):
     """Save a new API key with a custom name for the user."""
-    with sqlite3.connect(DB_PATH) as conn:
+    with get_connection() as conn:
         c = conn.cursor()
         c.execute('''INSERT OR REPLACE INTO api_keys (username, custom_name, api_type, api_key, last_updated)
                      VALUES (?, ?, ?, ?, ?)''',
@@ -50,14 +37,14 @@ def save_api_key(username, custom_name, api_type, api_key):
 
 def load_api_keys(username):
     """Load all API keys for a given username."""
-    with sqlite3.connect(DB_PATH) as conn:
+    with get_connection() as conn:
         c = conn.cursor()
         c.execute("SELECT custom_name, api_type, api_key FROM api_keys WHERE username = ? ORDER BY last_updated DESC", (username,))
         return [{"custom_name": row[0], "api_type": row[1], "api_key": row[2]} for row in c.fetchall()]
 
 def delete_api_key(username, custom_name):
     """Delete an API key by custom name for a user."""
-    with sqlite3.connect(DB_PATH) as conn:
+    with get_connection() as conn:
         c = conn.cursor()
         c.execute("DELETE FROM api_keys WHERE username = ? AND custom_name = ?", (username, custom_name))
         conn.commit()
@@ -65,7 +52,7 @@ def delete_api_key(username, custom_name):
 
 # Update save_credentials to not require api_type and api_key initially
 def save_credentials(username, credentials):
-    with sqlite3.connect(DB_PATH) as conn:
+    with get_connection() as conn:
         c = conn.cursor()
         c.execute('''INSERT OR REPLACE INTO credentials (username, password, email, api_type, api_key, last_updated)
                      VALUES (?, ?, ?, ?, ?, ?)''',
@@ -74,7 +61,7 @@ def save_credentials(username, credentials):
         conn.commit()
 
 def load_credentials(username):
-    with sqlite3.connect(DB_PATH) as conn:
+    with get_connection() as conn:
         c = conn.cursor()
         c.execute("SELECT password, email, api_type, api_key FROM credentials WHERE username = ?", (username,))
         row = c.fetchone()
@@ -89,59 +76,58 @@ def load_credentials(username):
         return None
 
 def load_personality(preset_name):
-    init_setup_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT settings FROM personalities WHERE preset_name = ?", (preset_name,))
-    row = c.fetchone()
-    conn.close()
-    if row:
-        settings = ast.literal_eval(row[0])
-        if 'engagement_style' in settings:
-            del settings['engagement_style']  # Remove engagement_style after loading
-        settings.setdefault('language', 'English')
-        settings.setdefault('autodetect_language', False)
-        logging.info(f"Loaded personality preset '{preset_name}'")
-        return settings
-    logging.warning(f"No preset found with name '{preset_name}'")
-    return None
+    conn = get_connection()
+    row = conn.execute("SELECT last_updated FROM personalities WHERE preset_name = ?", (preset_name,)).fetchone()
+    if not row:
+        _personality_cache.pop(preset_name, None)
+        logging.warning(f"No preset found with name '{preset_name}'")
+        return None
+    cached = _personality_cache.get(preset_name)
+    if cached and cached[0] == row[0]:
+        settings = cached[1]
+    else:
+        settings_json = conn.execute("SELECT settings FROM personalities WHERE preset_name = ?", (preset_name,)).fetchone()[0]
+        try:
+            settings = _normalize_personality(json.loads(settings_json))
+        except (ValueError, TypeError) as e:
+            logging.error(f"Personality preset '{preset_name}' is corrupt: {e}")
+            return None
+        _personality_cache[preset_name] = (row[0], settings)
+    logging.info(f"Loaded personality preset '{preset_name}'")
+    return copy.deepcopy(settings)
 
 def get_all_usernames():
-    with sqlite3.connect(DB_PATH) as conn:
+    with get_connection() as conn:
         c = conn.cursor()
         c.execute("SELECT username FROM credentials ORDER BY last_updated DESC")
         return [row[0] for row in c.fetchall()]
 
 def get_all_personality_presets():
-    with sqlite3.connect(DB_PATH) as conn:
+    with get_connection() as conn:
         c = conn.cursor()
         c.execute("SELECT preset_name FROM personalities ORDER BY last_updated DESC")
         return [row[0] for row in c.fetchall()]
 
 def delete_personality(preset_name):
-    with sqlite3.connect(DB_PATH) as conn:
+    with get_connection() as conn:
         c = conn.cursor()
         c.execute("DELETE FROM personalities WHERE preset_name = ?", (preset_name,))
         conn.commit()
+    _personality_cache.pop(preset_name, None)
 
 def save_personality(preset_name, settings):
-    init_setup_db()
-    if 'engagement_style' in settings:
-        del settings['engagement_style']
-    settings.setdefault('language', 'English')
-    settings.setdefault('autodetect_language', False)
-    settings_str = str(settings)
+    _normalize_personality(settings)
+    settings_json = json.dumps(settings, ensure_ascii=False)
     timestamp = datetime.now().isoformat()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('INSERT OR REPLACE INTO personalities (preset_name, settings, last_updated) VALUES (?, ?, ?)',
-              (preset_name, settings_str, timestamp))
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        conn.execute('INSERT OR REPLACE INTO personalities (preset_name, settings, last_updated) VALUES (?, ?, ?)',
+                     (preset_name, settings_json, timestamp))
+    _personality_cache[preset_name] = (timestamp, copy.deepcopy(settings))
     logging.info(f"Saved personality preset '{preset_name}'")
 
 if __name__ == "__main__":
-    init_setup_db()
+    from .migrations import run_migrations
+    run_migrations()
     test_credentials = {
         "username": "test_user",
         "password": "test_pass",
@@ -649,6 +649,8 @@ def logout(root):
 
 if __name__ == "__main__":
     from .xlogin_setup_gui import select_setup_gui
+    from .migrations import run_migrations
+    run_migrations()
     choice = select_setup_gui()
     logging.info(f"Setup choice received: {choice}")
     if choice and choice["action"] == "new":
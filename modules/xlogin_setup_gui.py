@@ -1,7 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
-from .xlogin_db import get_all_usernames, init_setup_db, load_credentials, save_credentials
+from .xlogin_db import get_all_usernames, load_credentials, save_credentials
 
 shutdown_flag = False
 
@@ -9,7 +9,6 @@ def select_setup_gui():
     """Create a GUI for signing in to an existing account or signing up with new credentials."""
     global shutdown_flag
     shutdown_flag = False
-    init_setup_db()
     usernames = get_all_usernames()
 
     root = tk.Tk()
@@ -120,5 +119,7 @@ def select_setup_gui():
     return getattr(root, "result", {"action": "new", "username": None})
 
 if __name__ == "__main__":
+    from .migrations import run_migrations
+    run_migrations()
     choice = select_setup_gui()
     print(f"Setup choice: {choice}")
\ No newline at end of file